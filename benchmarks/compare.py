@@ -0,0 +1,48 @@
+"""
+Сравнение двух отчётов бенчмарков (--bench-json) по медиане.
+
+    python benchmarks/compare.py before.json after.json --threshold 1.2
+
+Завершается с кодом 1, если хотя бы один случай стал медленнее порога
+или выполняет больше SQL-запросов, чем раньше.
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path, encoding="utf-8") as stream:
+        return json.load(stream)["benchmarks"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="Допустимое отношение медиан после/до.")
+    options = parser.parse_args()
+
+    before, after = load(options.before), load(options.after)
+    regressions = 0
+    print(f"{'case':<28}{'before, ms':>12}{'after, ms':>12}{'ratio':>8}"
+          f"{'queries':>10}")
+    for name in sorted(set(before) | set(after)):
+        if name not in before or name not in after:
+            print(f"{name:<28}{'только в одном отчёте':>42}")
+            continue
+        old, new = before[name], after[name]
+        ratio = new["median_ms"] / old["median_ms"]
+        queries = f"{old['queries']}→{new['queries']}"
+        mark = ""
+        if ratio > options.threshold or new["queries"] > old["queries"]:
+            regressions += 1
+            mark = "  <-- регрессия"
+        print(f"{name:<28}{old['median_ms']:>12.1f}{new['median_ms']:>12.1f}"
+              f"{ratio:>8.2f}{queries:>10}{mark}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
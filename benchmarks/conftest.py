@@ -0,0 +1,132 @@
+"""
+Окружение бенчмарков: синтетическая база и сбор результатов в JSON.
+
+    python -m pytest benchmarks --bench-posts 1000000 \\
+        --bench-json benchmarks/results/$(git rev-parse --short HEAD).json
+    python benchmarks/compare.py old.json new.json
+"""
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import time
+from io import StringIO
+
+import django
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+RESULTS = {}
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("yatube benchmarks")
+    group.addoption("--bench-posts", type=int, default=20000,
+                    help="Сколько записей сгенерировать.")
+    group.addoption("--bench-users", type=int, default=50)
+    group.addoption("--bench-groups", type=int, default=10)
+    group.addoption("--bench-seed", type=int, default=42)
+    group.addoption("--bench-rounds", type=int, default=5,
+                    help="Замеров на каждый случай после прогрева.")
+    group.addoption("--bench-json", metavar="PATH",
+                    help="Куда записать отчёт в JSON.")
+
+
+@pytest.fixture(scope="session")
+def django_db_setup(django_db_setup, django_db_blocker, pytestconfig):
+    # Измеряется полная отрисовка страницы, а не чтение кэша фрагментов.
+    settings.CACHES["benchmark"] = {
+        "BACKEND": "django.core.cache.backends.dummy.DummyCache",
+    }
+    settings.POSTS_CACHE_ALIAS = "benchmark"
+    with django_db_blocker.unblock():
+        call_command(
+            "generate_posts",
+            posts=pytestconfig.getoption("bench_posts"),
+            users=pytestconfig.getoption("bench_users"),
+            groups=pytestconfig.getoption("bench_groups"),
+            seed=pytestconfig.getoption("bench_seed"),
+            stdout=StringIO(),
+        )
+
+
+@pytest.fixture
+def bench(pytestconfig):
+    rounds = pytestconfig.getoption("bench_rounds")
+
+    def run(name, client, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        assert response.status_code == 200, url
+        query_count = len(queries)
+        timings = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            client.get(url)
+            timings.append((time.perf_counter() - started) * 1000)
+        RESULTS[name] = {
+            "url": url,
+            "queries": query_count,
+            "rounds": rounds,
+            "min_ms": round(min(timings), 3),
+            "median_ms": round(statistics.median(timings), 3),
+            "mean_ms": round(statistics.mean(timings), 3),
+            "max_ms": round(max(timings), 3),
+        }
+        return response
+
+    return run
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def pytest_sessionfinish(session):
+    path = session.config.getoption("bench_json")
+    if not path or not RESULTS:
+        return
+    option = session.config.getoption
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "posts": option("bench_posts"),
+            "users": option("bench_users"),
+            "groups": option("bench_groups"),
+            "seed": option("bench_seed"),
+        },
+        "benchmarks": RESULTS,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as stream:
+        json.dump(report, stream, indent=2, sort_keys=True,
+                  ensure_ascii=False)
+        stream.write("\n")
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not RESULTS:
+        return
+    terminalreporter.section("benchmarks")
+    terminalreporter.write_line(
+        f"{'case':<28}{'queries':>8}{'median, ms':>12}{'min, ms':>10}"
+    )
+    for name, result in sorted(RESULTS.items()):
+        terminalreporter.write_line(
+            f"{name:<28}{result['queries']:>8}"
+            f"{result['median_ms']:>12.1f}{result['min_ms']:>10.1f}"
+        )
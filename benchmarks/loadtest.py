@@ -0,0 +1,134 @@
+"""
+Нагрузочный тест: WSGI против ASGI при множестве медленных клиентов.
+
+Каждый клиент отправляет запрос по кускам с паузами и читает ответ
+медленно, как мобильный браузер на плохой сети. Скрипт сравнивает p50/p99
+задержки и число запросов в секунду для нескольких запущенных серверов:
+
+    gunicorn --workers 1 --threads 8 --bind 127.0.0.1:8000 yatube.wsgi
+    uvicorn --port 8001 yatube.asgi:application
+    python benchmarks/loadtest.py \\
+        --target wsgi=http://127.0.0.1:8000 \\
+        --target asgi=http://127.0.0.1:8001
+
+У обоих серверов должно быть одинаковое число потоков Django (8 — значение
+ASGI_THREADS по умолчанию), иначе сравнение нечестное.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from urllib.parse import urlsplit
+
+FEED_PATHS = ("/", "/group/")
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def fetch(host, port, path, trickle, read_delay):
+    started = time.perf_counter()
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        request = (
+            f"GET {path} HTTP/1.1\r\n"
+            f"Host: {host}:{port}\r\n"
+            "User-Agent: yatube-loadtest\r\n"
+            "Connection: close\r\n"
+            "\r\n"
+        ).encode()
+        for line in request.splitlines(keepends=True):
+            writer.write(line)
+            await writer.drain()
+            await asyncio.sleep(trickle)
+        status_line = await reader.readline()
+        status = int(status_line.split()[1])
+        while await reader.read(1024):
+            await asyncio.sleep(read_delay)
+    finally:
+        writer.close()
+    return status, time.perf_counter() - started
+
+
+async def client(target, paths, requests, options, latencies, errors):
+    for path in itertools.islice(itertools.cycle(paths), requests):
+        try:
+            status, latency = await fetch(
+                target.hostname, target.port or 80, path,
+                options.trickle, options.read_delay,
+            )
+        except (OSError, ValueError, IndexError):
+            errors.append(path)
+            continue
+        if status >= 400:
+            errors.append(path)
+        else:
+            latencies.append(latency)
+
+
+async def run_target(url, options):
+    target = urlsplit(url)
+    latencies = []
+    errors = []
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        client(target, options.paths, options.requests, options,
+               latencies, errors)
+        for _ in range(options.clients)
+    ))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--target", action="append", required=True, metavar="NAME=URL",
+        help="Сервер для сравнения, например wsgi=http://127.0.0.1:8000.",
+    )
+    parser.add_argument("--paths", nargs="+", default=list(FEED_PATHS))
+    parser.add_argument("--clients", type=int, default=200,
+                        help="Одновременных медленных клиентов.")
+    parser.add_argument("--requests", type=int, default=5,
+                        help="Запросов на клиента.")
+    parser.add_argument("--trickle", type=float, default=0.05,
+                        help="Пауза между строками запроса, с.")
+    parser.add_argument("--read-delay", type=float, default=0.01,
+                        help="Пауза между чтениями по 1 КБ ответа, с.")
+    parser.add_argument("--json", action="store_true",
+                        help="Вывести результат в JSON.")
+    return parser.parse_args()
+
+
+def main():
+    options = parse_args()
+    results = {}
+    for target in options.target:
+        name, _, url = target.partition("=")
+        results[name] = asyncio.run(run_target(url, options))
+
+    if options.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'server':<10}{'ok':>8}{'errors':>8}{'req/s':>10}"
+          f"{'p50, ms':>10}{'p99, ms':>10}")
+    for name, result in results.items():
+        print(f"{name:<10}{result['requests']:>8}{result['errors']:>8}"
+              f"{result['rps']:>10.1f}{result['p50_ms']:>10.1f}"
+              f"{result['p99_ms']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Время рендеринга шаблонов лент: настройки разработки против production.
+
+Сравнивает профиль автора на 5 постов и главную на 10 постов при
+загрузчиках из yatube.settings (шаблоны читаются и разбираются заново
+на каждый рендер) и из yatube.settings_production (кэширующий загрузчик
+и собранные flatten_templates шаблоны без include). База данных не нужна:
+посты создаются в памяти, фрагментный кэш отключён.
+
+    python manage.py flatten_templates
+    python benchmarks/render_templates.py --repeat 500
+"""
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup():
+    sys.path.insert(0, BASE_DIR)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "yatube.settings")
+    import django
+    from django.conf import settings
+
+    django.setup()
+    # Без кэша фрагментов измеряется именно рендеринг, а не чтение кэша.
+    settings.CACHES["benchmark"] = {
+        "BACKEND": "django.core.cache.backends.dummy.DummyCache",
+    }
+
+
+def make_engines():
+    from django.conf import settings
+    from django.template.backends.django import DjangoTemplates
+
+    from yatube import settings_production
+
+    engines = {}
+    for name, config in (("dev", settings.TEMPLATES[0]),
+                         ("production", settings_production.TEMPLATES[0])):
+        params = {key: value for key, value in config.items()
+                  if key != "BACKEND"}
+        params["NAME"] = name
+        params["OPTIONS"] = dict(params.get("OPTIONS", {}))
+        engines[name] = DjangoTemplates(params)
+    return engines
+
+
+def make_pages():
+    from django.contrib.auth import get_user_model
+    from django.core.paginator import Paginator
+
+    from posts.models import Group, Post
+
+    User = get_user_model()
+    author = User(pk=1, username="leo", first_name="Лев",
+                  last_name="Толстой")
+    group = Group(pk=1, title="Классика", slug="classic")
+    posts = [
+        Post(pk=pk, text="Текст поста\n" * 20, author=author, group=group,
+             pub_date=datetime(2026, 1, 1, tzinfo=timezone.utc))
+        for pk in range(1, 101)
+    ]
+    feed_cache = SimpleNamespace(timeout=0, key="benchmark",
+                                 alias="benchmark")
+
+    def page(per_page):
+        paginator = Paginator(posts, per_page)
+        return {"paginator": paginator, "page": paginator.get_page(2),
+                "feed_cache": feed_cache}
+
+    return {
+        "profile": ("posts/profile.html",
+                    dict(page(5), author=author, post_count=len(posts))),
+        "index": ("index.html", page(10)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=200,
+                        help="Рендеров на каждую пару шаблон/настройки.")
+    options = parser.parse_args()
+
+    setup()
+    from django.contrib.auth.models import AnonymousUser
+    from django.test import RequestFactory
+
+    request = RequestFactory().get("/?page=2")
+    request.user = AnonymousUser()
+    engines = make_engines()
+    pages = make_pages()
+
+    print(f"{'page':<10}{'dev, µs':>12}{'production, µs':>18}{'speedup':>10}")
+    for page, (template_name, context) in pages.items():
+        timings = {}
+        for name, engine in engines.items():
+            def render():
+                engine.get_template(template_name).render(context, request)
+
+            render()
+            timings[name] = (
+                timeit.timeit(render, number=options.repeat)
+                / options.repeat * 1e6
+            )
+        print(f"{page:<10}{timings['dev']:>12.0f}"
+              f"{timings['production']:>18.0f}"
+              f"{timings['dev'] / timings['production']:>10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Конкурентные чтение и запись в SQLite: обычный журнал против WAL.
+
+Читатели в потоках непрерывно открывают главную страницу, а пишущие
+потоки публикуют записи через new_post. Для каждого профиля базы
+(настройки разработки и yatube.settings_production) создаётся своя
+временная база, и скрипт печатает задержки чтения и число ошибок
+«database is locked».
+
+    python benchmarks/sqlite_stress.py --seconds 10 --readers 8
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROFILES = {
+    "default": "yatube.settings",
+    "production": "yatube.settings_production",
+}
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))]
+
+
+def run_profile(options):
+    """Выполняется в отдельном процессе с нужным DJANGO_SETTINGS_MODULE."""
+    sys.path.insert(0, BASE_DIR)
+    from django.conf import settings
+
+    settings.DATABASES["default"]["NAME"] = options.database
+    # Каждое чтение должно доходить до базы, а не до кэша фрагментов.
+    settings.CACHES = {"default": {
+        "BACKEND": "django.core.cache.backends.dummy.DummyCache",
+    }}
+    # Сравниваются базы, а не статика: без collectstatic хешированных
+    # имён нет.
+    settings.STATICFILES_STORAGE = (
+        "django.contrib.staticfiles.storage.StaticFilesStorage"
+    )
+    import django
+
+    django.setup()
+    from django.core.management import call_command
+    from django.db import OperationalError, connection
+    from django.test import Client
+
+    from posts.models import User
+
+    call_command("migrate", verbosity=0)
+    call_command("generate_posts", posts=options.posts, users=10, groups=3,
+                 stdout=open(os.devnull, "w"))
+    writer = User.objects.filter(username__startswith="bench_user_").first()
+    connection.close()
+
+    stop = threading.Event()
+    latencies = []
+    stats = {"reads": 0, "writes": 0, "read_errors": 0, "write_errors": 0,
+             "other_errors": 0, "first_error": ""}
+    lock = threading.Lock()
+
+    def failed(error):
+        # Любая другая ошибка тоже учитывается, а не молча обрывает поток.
+        with lock:
+            stats["other_errors"] += 1
+            stats["first_error"] = stats["first_error"] or repr(error)
+
+    def read():
+        client = Client()
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                client.get("/")
+            except OperationalError:
+                with lock:
+                    stats["read_errors"] += 1
+                continue
+            except Exception as error:
+                failed(error)
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - started)
+                stats["reads"] += 1
+
+    def write():
+        client = Client()
+        client.force_login(writer)
+        number = 0
+        while not stop.is_set():
+            number += 1
+            try:
+                client.post("/new/", {"text": f"Запись {number}"})
+            except OperationalError:
+                with lock:
+                    stats["write_errors"] += 1
+                continue
+            except Exception as error:
+                failed(error)
+                continue
+            with lock:
+                stats["writes"] += 1
+
+    threads = [threading.Thread(target=read) for _ in range(options.readers)]
+    threads += [threading.Thread(target=write)
+                for _ in range(options.writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(options.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA journal_mode")
+        stats["journal_mode"] = cursor.fetchone()[0]
+    stats.update({
+        "reads_per_second": stats["reads"] / options.seconds,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": max(latencies, default=0) * 1000,
+    })
+    print(json.dumps(stats))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--posts", type=int, default=2000,
+                        help="Записей в базе до начала нагрузки.")
+    parser.add_argument("--database", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main():
+    options = parse_args()
+    if options.database:
+        run_profile(options)
+        return
+
+    results = {}
+    for name, settings_module in PROFILES.items():
+        with tempfile.TemporaryDirectory() as directory:
+            output = subprocess.run(
+                [sys.executable, __file__, *sys.argv[1:],
+                 "--database", os.path.join(directory, "stress.sqlite3")],
+                env=dict(os.environ, DJANGO_SETTINGS_MODULE=settings_module),
+                capture_output=True, text=True, check=True,
+            ).stdout
+        results[name] = json.loads(output.strip().splitlines()[-1])
+
+    print(f"{'profile':<12}{'journal':>9}{'reads/s':>9}{'p50, ms':>9}"
+          f"{'p99, ms':>9}{'max, ms':>9}{'writes':>8}{'errors':>8}"
+          f"{'other':>8}")
+    for name, result in results.items():
+        errors = result["read_errors"] + result["write_errors"]
+        print(f"{name:<12}{result['journal_mode']:>9}"
+              f"{result['reads_per_second']:>9.1f}{result['p50_ms']:>9.1f}"
+              f"{result['p99_ms']:>9.1f}{result['max_ms']:>9.1f}"
+              f"{result['writes']:>8}{errors:>8}{result['other_errors']:>8}")
+    for name, result in results.items():
+        if result["first_error"]:
+            print(f"{name}: {result['first_error']}")
+
+
+if __name__ == "__main__":
+    main()
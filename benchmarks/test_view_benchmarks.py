@@ -0,0 +1,64 @@
+"""Время ответа каждого view из posts/urls.py на синтетической базе."""
+import pytest
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+POSITIONS = ("first", "middle", "last")
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def author():
+    return User.objects.filter(username__startswith="bench_user_").first()
+
+
+@pytest.fixture
+def author_client(client, author):
+    client.force_login(author)
+    return client
+
+
+def feed_urls():
+    group = Group.objects.filter(slug__startswith="bench-group-").first()
+    author = User.objects.filter(username__startswith="bench_user_").first()
+    return {
+        "index": reverse("index"),
+        "group": reverse("group", kwargs={"slug": group.slug}),
+        "profile": reverse("profile", kwargs={"username": author.username}),
+        "search": reverse("search") + "?q=лев",
+    }
+
+
+@pytest.mark.parametrize("position", POSITIONS)
+@pytest.mark.parametrize("view", ("index", "group", "profile", "search"))
+def test_feed_page(bench, client, view, position):
+    url = feed_urls()[view]
+    separator = "&" if "?" in url else "?"
+    pages = client.get(url).context["paginator"].num_pages
+    number = {"first": 1, "middle": (pages + 1) // 2, "last": pages}
+    bench(f"{view}[{position}]", client,
+          f"{url}{separator}page={number[position]}")
+
+
+def test_group_list(bench, client):
+    bench("group_list", client, reverse("group_list"))
+
+
+def test_post(bench, client):
+    post = Post.objects.order_by("id")[Post.objects.count() // 2]
+    bench("post", client, reverse(
+        "post", kwargs={"username": post.author.username, "post_id": post.id}
+    ))
+
+
+def test_new_post(bench, author_client):
+    bench("new_post", author_client, reverse("new_post"))
+
+
+def test_post_edit(bench, author_client, author):
+    post = author.posts.first()
+    bench("post_edit", author_client, reverse(
+        "post_edit", kwargs={"username": author.username, "post_id": post.id}
+    ))
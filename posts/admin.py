@@ -1,13 +1,91 @@
+from datetime import datetime
+
 from django.contrib import admin
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from . import counters, export, search
+from .models import Group, Job, Post
+
+
+class PubDateMonthFilter(admin.SimpleListFilter):
+    """
+    Месяц публикации вместо date_hierarchy.
 
-from .models import Group, Post
+    date_hierarchy строит список дат через SELECT DISTINCT по усечённой
+    pub_date — полный проход таблицы с сортировкой на каждый показ.
+    Здесь месяцы берутся из диапазона между первой и последней записью:
+    MIN и MAX — два шага по индексу post_pub_date_idx, как и выборка
+    одного месяца.
+    """
+    title = "месяц публикации"
+    parameter_name = "month"
+
+    def lookups(self, request, model_admin):
+        # Отдельные запросы: SQLite берёт MIN или MAX из индекса, только
+        # если в запросе один такой агрегат.
+        dates = Post.objects.order_by().values_list("pub_date", flat=True)
+        first = dates.order_by("pub_date").first()
+        last = dates.order_by("-pub_date").first()
+        if first is None:
+            return []
+        first, last = timezone.localtime(first), timezone.localtime(last)
+        year, month = last.year, last.month
+        months = []
+        while (year, month) >= (first.year, first.month):
+            months.append((f"{year}-{month:02d}", f"{month:02d}.{year}"))
+            year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+        return months
+
+    def queryset(self, request, queryset):
+        if not self.value():
+            return queryset
+        try:
+            start = datetime.strptime(self.value(), "%Y-%m")
+        except ValueError:
+            return queryset.none()
+        end = start.replace(year=start.year + start.month // 12,
+                            month=start.month % 12 + 1)
+        return queryset.filter(pub_date__gte=timezone.make_aware(start),
+                               pub_date__lt=timezone.make_aware(end))
 
 
 class PostAdmin(admin.ModelAdmin):
-    list_display = ("text", "pub_date", "author")
+    list_display = ("text", "pub_date", "author", "group")
+    list_select_related = ("author", "group")
     search_fields = ("text",)
-    list_filter = ("pub_date",)
+    # Оба фильтра выбирают диапазон pub_date по post_pub_date_idx.
+    list_filter = ("pub_date", PubDateMonthFilter)
     empty_value_display = "-пусто-"
+    # Вместо второго COUNT(*) по всей таблице — ссылка «Показать все».
+    show_full_result_count = False
+    raw_id_fields = ("author",)
+    autocomplete_fields = ("group",)
+    actions = ("export_jsonl",)
+
+    def get_queryset(self, request):
+        # Без фильтров и поиска число записей берётся из счётчика.
+        return super().get_queryset(request).count_from(
+            counters.GLOBAL_SCOPE
+        )
+
+    def export_jsonl(self, request, queryset):
+        response = StreamingHttpResponse(
+            export.stream(queryset, compress=True),
+            content_type="application/gzip",
+        )
+        response["Content-Disposition"] = (
+            'attachment; filename="posts.jsonl.gz"'
+        )
+        return response
+
+    export_jsonl.short_description = "Выгрузить в JSONL (gzip)"
+
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск идёт по полнотекстовому индексу, а не LIKE '%...%'.
+        if not search_term:
+            return queryset, False
+        return search.filter_posts(queryset, search_term), False
 
 
 admin.site.register(Post, PostAdmin)
@@ -16,9 +94,25 @@ admin.site.register(Post, PostAdmin)
 class GroupAdmin(admin.ModelAdmin):
     list_display = ("title", "slug", "description")
     search_fields = ("title",)
-    list_filter = ("title",)
     empty_value_display = "-пусто-"
+    show_full_result_count = False
     prepopulated_fields = {"slug": ("title",)}
 
 
 admin.site.register(Group, GroupAdmin)
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("name", "run_at", "attempts", "failed")
+    list_filter = ("failed", "name")
+    readonly_fields = ("last_error",)
+    actions = ("retry",)
+
+    def retry(self, request, queryset):
+        queryset.update(failed=False, attempts=0, locked_by="",
+                        run_at=timezone.now())
+
+    retry.short_description = "Повторить задачи"
+
+
+admin.site.register(Job, JobAdmin)
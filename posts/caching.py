@@ -0,0 +1,69 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from yatube.routers import reads_from_primary
+
+# Область каталога групп: версия меняется при правке любой группы.
+GROUP_DIRECTORY = "groups"
+
+
+def get_cache():
+    return caches[settings.POSTS_CACHE_ALIAS]
+
+
+def _version_key(scope):
+    return f"posts:version:{scope}"
+
+
+def _now():
+    return int(time.time() * 1000000)
+
+
+def get_version(scope):
+    """
+    Текущая версия области (общая лента, группа, автор).
+
+    Версия — отметка времени в микросекундах: если ключ вытеснен из кэша,
+    новая версия всё равно окажется больше любой из прежних.
+    """
+    cache = get_cache()
+    version = cache.get(_version_key(scope))
+    if version is None:
+        version = _now()
+        cache.add(_version_key(scope), version, None)
+    return version
+
+
+def bump(*scopes):
+    cache = get_cache()
+    keys = [_version_key(scope) for scope in scopes]
+    current = cache.get_many(keys)
+    now = _now()
+    cache.set_many(
+        {key: max(now, current.get(key, 0) + 1) for key in keys}, None
+    )
+
+
+def bump_on_commit(*scopes):
+    # Повторный сброс после фиксации транзакции не даёт закэшировать
+    # фрагмент, отрисованный до того, как запись стала видна читателям.
+    bump(*scopes)
+    transaction.on_commit(lambda: bump(*scopes))
+
+
+class FeedFragment:
+    """Параметры тега {% cache %} для страницы ленты."""
+
+    def __init__(self, request, scope, *vary_on, timeout=None):
+        # Ссылки паджинатора сохраняют все GET-параметры, поэтому ключ
+        # зависит от всей строки запроса, а не только от page/cursor.
+        # Отстающая реплика могла ещё не получить запись, от которой
+        # сменилась версия; её фрагмент не должен достаться автору записи.
+        parts = [scope, get_version(scope), request.GET.urlencode(),
+                 reads_from_primary(), *vary_on]
+        self.key = ":".join(str(part) for part in parts)
+        self.alias = settings.POSTS_CACHE_ALIAS
+        self.timeout = timeout or settings.POSTS_FRAGMENT_CACHE_TIMEOUT
@@ -0,0 +1,59 @@
+import hashlib
+from datetime import datetime
+
+from django.utils import timezone
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_cookie
+
+from yatube.routers import reads_from_primary
+
+from . import caching
+
+
+def _version_time(version):
+    return datetime.fromtimestamp(version / 1000000, tz=timezone.utc)
+
+
+def _validators(request, state):
+    if state is None:
+        return None, None
+    scopes, updated_at = state
+    versions = [caching.get_version(scope) for scope in scopes]
+    # Шапка страницы зависит от того, кто смотрит, поэтому ETag тоже.
+    viewer = request.user.pk if request.user.is_authenticated else "-"
+    raw = ":".join(str(part) for part in (
+        *scopes, *versions, viewer, reads_from_primary()
+    ))
+    last_modified = _version_time(max(versions))
+    if updated_at is not None:
+        last_modified = max(last_modified, updated_at)
+    return hashlib.md5(raw.encode()).hexdigest(), last_modified
+
+
+def conditional_page(get_state):
+    """
+    Отвечает 304 Not Modified, если области страницы не менялись.
+
+    Валидаторы строятся по версиям областей из posts.caching — это время
+    последней записи в области, которое хранится в кэше, так что проверка
+    не трогает ленту и не рендерит шаблон. get_state(request, **kwargs)
+    возвращает (области, время правки записи или None), либо None, если
+    объекта нет: тогда view отрабатывает как обычно и отдаёт 404.
+    """
+    def validators(request, *args, **kwargs):
+        if not hasattr(request, "_posts_validators"):
+            request._posts_validators = _validators(
+                request, get_state(request, *args, **kwargs)
+            )
+        return request._posts_validators
+
+    def etag(request, *args, **kwargs):
+        return validators(request, *args, **kwargs)[0]
+
+    def last_modified(request, *args, **kwargs):
+        return validators(request, *args, **kwargs)[1]
+
+    def decorator(view):
+        return vary_on_cookie(condition(etag, last_modified)(view))
+
+    return decorator
@@ -0,0 +1,130 @@
+from django.db.models import Count, F, Max, Subquery
+from django.db.models.functions import Greatest
+
+from .models import Follow, Post, PostCounter
+
+GLOBAL_SCOPE = "all"
+
+
+def author_scope(author_id):
+    return f"author:{author_id}"
+
+
+def group_scope(group_id):
+    return f"group:{group_id}"
+
+
+def followers_scope(author_id):
+    return f"followers:{author_id}"
+
+
+def follows_scope(user_id):
+    return f"follows:{user_id}"
+
+
+def post_scopes(author_id, group_id):
+    scopes = [GLOBAL_SCOPE, author_scope(author_id)]
+    if group_id is not None:
+        scopes.append(group_scope(group_id))
+    return scopes
+
+
+def get_count(scope):
+    count = PostCounter.objects.filter(scope=scope).values_list(
+        "count", flat=True
+    ).first()
+    return count or 0
+
+
+def get_counts(*scopes):
+    """Несколько счётчиков одним запросом: {область: значение}."""
+    counts = dict.fromkeys(scopes, 0)
+    counts.update(PostCounter.objects.filter(scope__in=scopes).values_list(
+        "scope", "count"
+    ))
+    return counts
+
+
+def change(scopes, delta):
+    for scope in scopes:
+        # Счётчик мог разойтись с базой (bulk_create, update(), повтор
+        # задачи): уход ниже нуля нарушил бы CHECK и сорвал удаление.
+        updated = PostCounter.objects.filter(scope=scope).update(
+            count=Greatest(F("count") + delta, 0)
+        )
+        if not updated and delta > 0:
+            PostCounter.objects.get_or_create(scope=scope)
+            PostCounter.objects.filter(scope=scope).update(
+                count=F("count") + delta
+            )
+
+
+def _scope_posts(scope):
+    if scope == GLOBAL_SCOPE:
+        return Post.objects.all()
+    kind, _, pk = scope.partition(":")
+    if kind == "author":
+        return Post.objects.filter(author_id=pk)
+    if kind == "group":
+        return Post.objects.filter(group_id=pk)
+    return None
+
+
+def refresh_last_post_dates(scopes):
+    """
+    Переписывает last_post_date областей после записи или удаления.
+
+    Каждая дата — один шаг по индексу ленты области, поэтому повтор
+    и правка задним числом всегда дают верный результат.
+    """
+    for scope in scopes:
+        posts = _scope_posts(scope)
+        if posts is None:
+            continue
+        PostCounter.objects.filter(scope=scope).update(
+            last_post_date=Subquery(
+                posts.order_by("-pub_date").values("pub_date")[:1]
+            )
+        )
+
+
+def get_counters(*scopes):
+    """Строки счётчиков одним запросом: {область: PostCounter}."""
+    rows = PostCounter.objects.in_bulk(scopes, field_name="scope")
+    return {scope: rows.get(scope) or PostCounter(scope=scope)
+            for scope in scopes}
+
+
+def rebuild():
+    """Пересчитывает все счётчики по таблицам записей и подписок."""
+    total = Post.objects.aggregate(total=Count("id"), last=Max("pub_date"))
+    counters = [PostCounter(scope=GLOBAL_SCOPE, count=total["total"],
+                            last_post_date=total["last"])]
+    by_author = Post.objects.order_by().values("author").annotate(
+        total=Count("id"), last=Max("pub_date")
+    )
+    counters.extend(
+        PostCounter(scope=author_scope(row["author"]), count=row["total"],
+                    last_post_date=row["last"])
+        for row in by_author
+    )
+    by_group = Post.objects.filter(group__isnull=False).order_by().values(
+        "group"
+    ).annotate(total=Count("id"), last=Max("pub_date"))
+    counters.extend(
+        PostCounter(scope=group_scope(row["group"]), count=row["total"],
+                    last_post_date=row["last"])
+        for row in by_group
+    )
+    for field, scope in (("author", followers_scope),
+                         ("user", follows_scope)):
+        rows = Follow.objects.order_by().values(field).annotate(
+            total=Count("id")
+        )
+        counters.extend(
+            PostCounter(scope=scope(row[field]), count=row["total"])
+            for row in rows
+        )
+    PostCounter.objects.all().delete()
+    PostCounter.objects.bulk_create(counters)
+    return len(counters)
@@ -0,0 +1,59 @@
+import csv
+import json
+import zlib
+
+FIELDS = ("id", "text", "pub_date", "author__username", "group__slug")
+# Имена колонок совпадают с форматом команды import_posts.
+HEADER = ("id", "text", "pub_date", "author", "group")
+FORMATS = ("jsonl", "csv")
+
+
+def export_rows(queryset, chunk_size=2000):
+    """Кортежи значений без создания моделей и без кэша QuerySet."""
+    return queryset.order_by("id").values_list(*FIELDS).iterator(
+        chunk_size=chunk_size
+    )
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def serialize(rows, fmt):
+    if fmt == "csv":
+        writer = csv.writer(_Echo())
+        yield writer.writerow(HEADER)
+        for pk, text, pub_date, author, group in rows:
+            yield writer.writerow(
+                (pk, text, pub_date.isoformat(), author, group or "")
+            )
+        return
+    for pk, text, pub_date, author, group in rows:
+        yield json.dumps({
+            "id": pk,
+            "text": text,
+            "pub_date": pub_date.isoformat(),
+            "author": author,
+            "group": group,
+        }, ensure_ascii=False) + "\n"
+
+
+def encode(chunks, compress=False):
+    """Кодирует текст в UTF-8, при необходимости сжимая поток в gzip."""
+    if not compress:
+        for chunk in chunks:
+            yield chunk.encode()
+        return
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream(queryset, fmt="jsonl", compress=False, chunk_size=2000):
+    return encode(
+        serialize(export_rows(queryset, chunk_size), fmt), compress
+    )
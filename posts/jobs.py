@@ -0,0 +1,168 @@
+"""
+Фоновые задачи: побочные эффекты записи выполняются после ответа.
+
+Задача — строка Job с именем обработчика и JSON-параметрами. Обработчик
+получает параметры сразу нескольких задач с одним именем, поэтому пачка
+новых записей обновляет счётчики и поисковый индекс за один проход. Если
+пачка падает, её задачи повторяются по одной; упавшая задача
+откладывается с удвоением паузы, а после POSTS_JOBS_MAX_ATTEMPTS попыток
+помечается failed и остаётся в таблице для разбора.
+
+Строки задач удаляются в той же транзакции, что и изменения обработчика:
+если исполнитель упал или срок его аренды истёк и задачи забрал другой,
+откатывается всё вместе, и изменения в базе (например, счётчики)
+применяются ровно один раз. Повториться могут только действия вне базы —
+письма, файлы миниатюр, сброс кэша.
+
+Режим выполнения — settings.POSTS_JOBS_MODE:
+
+    "eager"  — обработчик выполняется сразу, в текущей транзакции, без
+               строки в таблице (разработка и тесты);
+    "thread" — строку подхватывает поток внутри процесса после коммита;
+    "worker" — задачи выполняет только manage.py run_jobs.
+"""
+import json
+import logging
+import threading
+import traceback
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_handlers = {}
+
+
+def handler(name):
+    """Регистрирует обработчик задач name: fn(payloads)."""
+    def register(fn):
+        _handlers[name] = fn
+        return fn
+    return register
+
+
+def enqueue(name, **payload):
+    payload = json.dumps(payload)
+    if settings.POSTS_JOBS_MODE == "eager":
+        _run(name, [json.loads(payload)])
+        return
+    Job.objects.create(name=name, payload=payload)
+    if settings.POSTS_JOBS_MODE == "thread":
+        transaction.on_commit(worker.wake)
+
+
+class _LeaseLost(Exception):
+    """Задачи пачки уже забрал другой исполнитель."""
+
+
+def _run(name, payloads, group=()):
+    with transaction.atomic():
+        _handlers[name](payloads)
+        if group:
+            deleted, _ = Job.objects.filter(
+                id__in=[job.id for job in group],
+                locked_by=group[0].locked_by,
+            ).delete()
+            if deleted != len(group):
+                raise _LeaseLost
+
+
+def _claim(batch_size):
+    """Забирает готовые задачи; строки остальных исполнителей не трогает."""
+    now = timezone.now()
+    ids = list(Job.objects.filter(failed=False, run_at__lte=now).order_by(
+        "run_at", "id"
+    ).values_list("id", flat=True)[:batch_size])
+    if not ids:
+        return []
+    token = uuid.uuid4().hex
+    # Пока задача выполняется, run_at сдвинут на срок аренды: если
+    # исполнитель умрёт, задачу по истечении срока заберёт другой.
+    Job.objects.filter(id__in=ids, failed=False, run_at__lte=now).update(
+        locked_by=token,
+        run_at=now + timedelta(seconds=settings.POSTS_JOBS_LEASE),
+    )
+    return list(Job.objects.filter(id__in=ids, locked_by=token))
+
+
+def _retry(job, error):
+    job.attempts += 1
+    job.failed = job.attempts >= settings.POSTS_JOBS_MAX_ATTEMPTS
+    job.run_at = timezone.now() + timedelta(
+        seconds=settings.POSTS_JOBS_RETRY_DELAY * 2 ** (job.attempts - 1)
+    )
+    # Строку, которую уже забрал другой исполнитель, не трогаем.
+    Job.objects.filter(id=job.id, locked_by=job.locked_by).update(
+        attempts=job.attempts, failed=job.failed, run_at=job.run_at,
+        locked_by="", last_error=error,
+    )
+    logger.warning("Job %s failed (attempt %s)", job, job.attempts)
+
+
+def _run_group(name, group):
+    """Выполняет задачи пачкой, а если она упала — по одной."""
+    try:
+        _run(name, [json.loads(job.payload) for job in group], group)
+        return
+    except _LeaseLost:
+        if len(group) == 1:
+            return
+    except Exception:
+        if len(group) == 1:
+            _retry(group[0], traceback.format_exc())
+            return
+    for job in group:
+        _run_group(name, [job])
+
+
+def run_batch(batch_size=None):
+    """Выполняет до batch_size готовых задач и возвращает их число."""
+    claimed = _claim(batch_size or settings.POSTS_JOBS_BATCH_SIZE)
+    by_name = defaultdict(list)
+    for job in claimed:
+        by_name[job.name].append(job)
+    for name, group in by_name.items():
+        _run_group(name, group)
+    return len(claimed)
+
+
+class Worker:
+    """Поток, выполняющий задачи внутри процесса (режим "thread")."""
+
+    def __init__(self):
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def wake(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self.run, name="posts-jobs", daemon=True
+                )
+                self._thread.start()
+        self._wakeup.set()
+
+    def run(self):
+        while True:
+            # Опрос по таймауту подхватывает отложенные повторы и задачи,
+            # поставленные другими процессами.
+            self._wakeup.wait(settings.POSTS_JOBS_POLL_INTERVAL)
+            self._wakeup.clear()
+            try:
+                while run_batch():
+                    pass
+            except Exception:
+                logger.exception("Job worker failed")
+            finally:
+                close_old_connections()
+
+
+worker = Worker()
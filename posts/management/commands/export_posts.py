@@ -0,0 +1,44 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from posts import export
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        "Выгружает все записи с username автора и slug группы в JSONL или "
+        "CSV, построчно и без загрузки таблицы в память."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path", nargs="?", default="-",
+            help="Файл для выгрузки; по умолчанию — stdout.",
+        )
+        parser.add_argument("--format", choices=export.FORMATS,
+                            default="jsonl")
+        parser.add_argument("--gzip", action="store_true",
+                            help="Сжать выгрузку в gzip.")
+        parser.add_argument(
+            "--chunk-size", type=int, default=2000,
+            help="Сколько строк читать из базы за раз.",
+        )
+
+    def handle(self, *args, **options):
+        chunks = export.stream(
+            Post.objects.all(),
+            fmt=options["format"],
+            compress=options["gzip"],
+            chunk_size=options["chunk_size"],
+        )
+        if options["path"] == "-":
+            output = sys.stdout.buffer
+            for chunk in chunks:
+                output.write(chunk)
+            output.flush()
+            return
+        with open(options["path"], "wb") as output:
+            for chunk in chunks:
+                output.write(chunk)
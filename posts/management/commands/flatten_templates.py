@@ -0,0 +1,84 @@
+import os
+import re
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.template import TemplateSyntaxError
+from django.template.backends.django import DjangoTemplates
+
+INCLUDE_RE = re.compile(r"""{%\s*include\s+(["'])([^"']+)\1\s*%}""")
+# Шаблоны с наследованием нельзя вставить текстом: блоки поменяют смысл.
+NOT_INLINABLE_RE = re.compile(r"{%\s*(extends|block)\b")
+
+
+class Command(BaseCommand):
+    help = (
+        "Собирает шаблоны из TEMPLATES_DIR в TEMPLATES_BUILD_DIR, заменяя "
+        "{% include \"...\" %} с постоянным именем текстом шаблона, и "
+        "проверяет, что результат компилируется."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output", default=settings.TEMPLATES_BUILD_DIR,
+            help="Каталог для собранных шаблонов.",
+        )
+
+    def handle(self, *args, **options):
+        self.source_dir = settings.TEMPLATES_DIR
+        output_dir = options["output"]
+        self.sources = {}
+        for root, _, files in os.walk(self.source_dir):
+            for filename in files:
+                if filename.endswith(".html"):
+                    path = os.path.join(root, filename)
+                    name = os.path.relpath(path, self.source_dir)
+                    with open(path, encoding="utf-8") as stream:
+                        self.sources[name.replace(os.sep, "/")] = stream.read()
+
+        inlined = 0
+        for name in sorted(self.sources):
+            flat, count = self.flatten(name, ())
+            inlined += count
+            target = os.path.join(output_dir, name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "w", encoding="utf-8") as stream:
+                stream.write(flat)
+
+        # Компилируем собранные шаблоны, чтобы ошибка всплыла при сборке,
+        # а не на первом запросе.
+        engine = DjangoTemplates({
+            "NAME": "flatten_templates",
+            "DIRS": [output_dir],
+            "APP_DIRS": False,
+            "OPTIONS": {},
+        }).engine
+        for name in sorted(self.sources):
+            try:
+                engine.get_template(name)
+            except TemplateSyntaxError as error:
+                raise CommandError(f"{name}: {error}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Собрано шаблонов: {len(self.sources)}, "
+            f"встроено include: {inlined}."
+        ))
+
+    def flatten(self, name, stack):
+        if name in stack:
+            raise CommandError(
+                "Циклический include: " + " -> ".join(stack + (name,))
+            )
+        count = 0
+
+        def replace(match):
+            nonlocal count
+            included = match.group(2)
+            source = self.sources.get(included)
+            if source is None or NOT_INLINABLE_RE.search(source):
+                return match.group(0)
+            flat, nested = self.flatten(included, stack + (name,))
+            count += nested + 1
+            return flat
+
+        return INCLUDE_RE.sub(replace, self.sources[name]), count
@@ -0,0 +1,109 @@
+import random
+import time
+from datetime import datetime, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from posts import caching, counters, search
+from posts.models import Group, Post, User, explicit_pub_date
+
+WORDS = (
+    "лев толстой война мир анна каренина пушкин онегин осень утро лес "
+    "река город дорога письмо дом сад море снег поезд вечер друг книга "
+    "ёлка ёжик гроза весна музыка память история свет тень небо ветер"
+).split()
+
+START = datetime(2015, 1, 1, tzinfo=timezone.utc)
+
+
+class Command(BaseCommand):
+    help = (
+        "Создаёт синтетических пользователей, группы и записи для "
+        "нагрузочных тестов. Одинаковый --seed даёт одинаковые данные."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--groups", type=int, default=20)
+        parser.add_argument("--posts", type=int, default=100000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--batch-size", type=int, default=5000,
+            help="Сколько записей вставлять одним INSERT и транзакцией.",
+        )
+
+    def handle(self, *args, **options):
+        if min(options["users"], options["batch_size"]) < 1:
+            raise CommandError("--users и --batch-size должны быть "
+                               "положительными.")
+        rng = random.Random(options["seed"])
+        started = time.monotonic()
+
+        # Хэш пароля считается один раз: это самая медленная часть
+        # создания пользователя.
+        password = make_password("bench-password")
+        User.objects.bulk_create([
+            User(username=f"bench_user_{number}", password=password,
+                 first_name="Автор", last_name=str(number))
+            for number in range(options["users"])
+        ], ignore_conflicts=True)
+        Group.objects.bulk_create([
+            Group(title=f"Группа {number}", slug=f"bench-group-{number}",
+                  description=self.text(rng, 20))
+            for number in range(options["groups"])
+        ], ignore_conflicts=True)
+        author_ids = list(User.objects.filter(
+            username__startswith="bench_user_"
+        ).order_by("id").values_list("id", flat=True))
+        group_ids = list(Group.objects.filter(
+            slug__startswith="bench-group-"
+        ).order_by("id").values_list("id", flat=True))
+
+        created = 0
+        total = options["posts"]
+        with explicit_pub_date():
+            while created < total:
+                size = min(options["batch_size"], total - created)
+                posts = [
+                    self.build_post(rng, created + number, author_ids,
+                                    group_ids)
+                    for number in range(size)
+                ]
+                with transaction.atomic():
+                    Post.objects.bulk_create(posts)
+                created += size
+                rate = created / (time.monotonic() - started)
+                self.stdout.write(f"{created} записей, {rate:.0f} в секунду")
+
+        # bulk_create не отправляет сигналы, поэтому производные данные
+        # пересобираются целиком.
+        counters.rebuild()
+        search.rebuild()
+        caching.bump(
+            counters.GLOBAL_SCOPE,
+            *(counters.author_scope(pk) for pk in author_ids),
+            *(counters.group_scope(pk) for pk in group_ids),
+        )
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Создано {created} записей у {len(author_ids)} авторов "
+            f"в {len(group_ids)} группах за {elapsed:.1f} с."
+        ))
+
+    @staticmethod
+    def text(rng, words):
+        return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+    def build_post(self, rng, number, author_ids, group_ids):
+        group_id = None
+        if group_ids and rng.random() < 0.8:
+            group_id = rng.choice(group_ids)
+        return Post(
+            text=self.text(rng, rng.randint(5, 60)),
+            author_id=rng.choice(author_ids),
+            group_id=group_id,
+            pub_date=START + timedelta(minutes=number),
+        )
@@ -0,0 +1,153 @@
+import csv
+import io
+import json
+import sys
+import time
+from collections import Counter
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts import caching, counters, search
+from posts.models import Group, Post, User, explicit_pub_date
+
+
+class Command(BaseCommand):
+    help = (
+        "Загружает записи из JSONL или CSV (файл или «-» для stdin). "
+        "Поля: text, author (username), group (slug), pub_date (ISO 8601)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Путь к файлу или «-» для stdin.")
+        parser.add_argument(
+            "--format", choices=("jsonl", "csv"),
+            help="Формат входных данных; по умолчанию — по расширению.",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=1000,
+            help="Сколько записей вставлять одним INSERT и транзакцией.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"]
+        if fmt is None:
+            fmt = "csv" if path.endswith(".csv") else "jsonl"
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size должен быть положительным.")
+
+        self.authors = {}
+        self.groups = {}
+        self.skipped = 0
+        imported = 0
+        started = time.monotonic()
+
+        # csv сам разбирает переводы строк, в том числе внутри кавычек.
+        newline = "" if fmt == "csv" else None
+        if path != "-":
+            stream = open(path, encoding="utf-8", newline=newline)
+        elif fmt == "csv":
+            stream = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8",
+                                      newline=newline)
+        else:
+            stream = sys.stdin
+        try:
+            rows = self.read_rows(stream, fmt)
+            with explicit_pub_date():
+                while True:
+                    batch = list(islice(rows, batch_size))
+                    if not batch:
+                        break
+                    imported += self.import_batch(batch)
+                    rate = imported / (time.monotonic() - started)
+                    self.stdout.write(
+                        f"{imported} записей, {rate:.0f} в секунду"
+                    )
+        finally:
+            if path != "-":
+                stream.close()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Загружено {imported} записей за {elapsed:.1f} с "
+            f"({imported / elapsed if elapsed else 0:.0f} в секунду), "
+            f"пропущено {self.skipped}."
+        ))
+
+    def read_rows(self, stream, fmt):
+        if fmt == "csv":
+            yield from csv.DictReader(stream)
+            return
+        for number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as error:
+                raise CommandError(f"Строка {number}: {error}")
+            if not isinstance(row, dict):
+                raise CommandError(f"Строка {number}: ожидался объект JSON.")
+            yield row
+
+    def resolve(self, batch):
+        """Подгружает авторов и группы пачки одним запросом на модель."""
+        usernames = {row.get("author") for row in batch} - set(self.authors)
+        if usernames:
+            self.authors.update(User.objects.filter(
+                username__in=usernames
+            ).values_list("username", "id"))
+        slugs = {row.get("group") for row in batch if row.get("group")}
+        slugs -= set(self.groups)
+        if slugs:
+            self.groups.update(Group.objects.filter(
+                slug__in=slugs
+            ).values_list("slug", "id"))
+
+    def build_post(self, row, now):
+        author_id = self.authors.get(row.get("author"))
+        group_slug = row.get("group") or None
+        group_id = self.groups.get(group_slug) if group_slug else None
+        pub_date = now
+        if row.get("pub_date"):
+            pub_date = parse_datetime(row["pub_date"])
+            if pub_date is not None and timezone.is_naive(pub_date):
+                pub_date = timezone.make_aware(pub_date)
+        if (not row.get("text") or author_id is None or pub_date is None
+                or (group_slug and group_id is None)):
+            self.skipped += 1
+            return None
+        return Post(text=row["text"], author_id=author_id,
+                    group_id=group_id, pub_date=pub_date)
+
+    def import_batch(self, batch):
+        self.resolve(batch)
+        now = timezone.now()
+        posts = [post for post in (self.build_post(row, now) for row in batch)
+                 if post is not None]
+        if not posts:
+            return 0
+
+        deltas = Counter()
+        for post in posts:
+            deltas.update(counters.post_scopes(post.author_id, post.group_id))
+
+        # bulk_create не отправляет сигналы: счётчики, поисковый индекс
+        # и версии кэша обновляются здесь же, в транзакции пачки.
+        with transaction.atomic():
+            last_id = Post.objects.order_by("-id").values_list(
+                "id", flat=True
+            ).first() or 0
+            Post.objects.bulk_create(posts)
+            search.index_posts(Post.objects.filter(
+                id__gt=last_id
+            ).values_list("id", "text"))
+            for scope, delta in deltas.items():
+                counters.change([scope], delta)
+            counters.refresh_last_post_dates(deltas)
+            caching.bump_on_commit(*deltas)
+        return len(posts)
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает счётчики записей: общий, по авторам и по группам."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            total = counters.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f"Пересчитано счётчиков: {total}")
+        )
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = "Заново строит полнотекстовый индекс записей."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size", type=int, default=2000,
+            help="Сколько записей читать и индексировать за раз.",
+        )
+
+    def handle(self, *args, **options):
+        if not search.is_supported():
+            raise CommandError("Полнотекстовый индекс есть только в SQLite.")
+        with transaction.atomic():
+            total = search.rebuild(chunk_size=options["chunk_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Проиндексировано записей: {total}")
+        )
@@ -0,0 +1,44 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from posts import jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Выполняет фоновые задачи posts.jobs. Исполнители забирают задачи "
+        "без пересечений, поэтому процессов можно запустить несколько."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.POSTS_JOBS_BATCH_SIZE,
+            help="Сколько задач забирать за раз.",
+        )
+        parser.add_argument(
+            "--sleep", type=float, default=settings.POSTS_JOBS_POLL_INTERVAL,
+            help="Пауза в секундах, когда готовых задач нет.",
+        )
+        parser.add_argument(
+            "--once", action="store_true",
+            help="Выполнить готовые задачи и выйти.",
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        try:
+            while True:
+                done = jobs.run_batch(options["batch_size"])
+                total += done
+                if done:
+                    continue
+                if options["once"]:
+                    break
+                close_old_connections()
+                time.sleep(options["sleep"])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"Обработано задач: {total}"))
@@ -0,0 +1,33 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Копирует основную SQLite-базу в файлы реплик из DATABASE_REPLICAS "
+        "(онлайн-бэкап, писать в основную базу можно и во время копии)."
+    )
+
+    def handle(self, *args, **options):
+        primary = connections["default"]
+        if primary.vendor != "sqlite":
+            raise CommandError("Команда нужна только для SQLite; реплики "
+                               "других СУБД наполняет сама СУБД.")
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError("DATABASE_REPLICAS пуст.")
+
+        primary.ensure_connection()
+        for alias in settings.DATABASE_REPLICAS:
+            replica = connections[alias]
+            replica.close()
+            target = sqlite3.connect(replica.settings_dict["NAME"])
+            try:
+                primary.connection.backup(target)
+            finally:
+                target.close()
+            self.stdout.write(self.style.SUCCESS(
+                f"{alias}: {replica.settings_dict['NAME']}"
+            ))
@@ -0,0 +1,175 @@
+"""
+Лёгкие метрики производительности по именам URL.
+
+MetricsMiddleware на каждый запрос считает число и время SQL-запросов,
+время рендеринга шаблона и общее время, а metrics_view отдаёт скользящие
+перцентили в текстовом формате Prometheus. Всё хранится в памяти
+процесса: на запрос — несколько вызовов perf_counter и append в deque.
+"""
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import connections
+from django.http import HttpResponse
+from django.template.backends import django as django_backend
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+METRICS = (
+    ("request_duration_seconds", "Общее время обработки запроса."),
+    ("sql_duration_seconds", "Время выполнения SQL-запросов."),
+    ("sql_queries", "Число SQL-запросов."),
+    ("template_duration_seconds",
+     "Время рендеринга шаблонов без SQL, выполненного при рендеринге."),
+)
+
+_local = threading.local()
+
+
+class Sample:
+    __slots__ = ("queries", "sql_time", "template_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        # Обёртка connection.execute_wrapper.
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_time += time.perf_counter() - started
+
+
+class Series:
+    """Последние значения для перцентилей и накопленные сумма и счётчик."""
+
+    def __init__(self, window):
+        self.values = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value):
+        self.values.append(value)
+        self.count += 1
+        self.total += value
+
+    def quantiles(self):
+        ordered = sorted(self.values)
+        if not ordered:
+            return [(q, 0.0) for q in QUANTILES]
+        last = len(ordered) - 1
+        return [(q, ordered[min(last, round(q * last))]) for q in QUANTILES]
+
+
+class Registry:
+    def __init__(self, window):
+        self.window = window
+        self.lock = threading.Lock()
+        self.series = defaultdict(lambda: Series(self.window))
+
+    def record(self, view, sample, duration):
+        values = (duration, sample.sql_time, sample.queries,
+                  sample.template_time)
+        with self.lock:
+            for (name, _), value in zip(METRICS, values):
+                self.series[name, view].add(value)
+
+    def clear(self):
+        with self.lock:
+            self.series.clear()
+
+    def render(self):
+        with self.lock:
+            snapshot = {
+                key: (series.quantiles(), series.count, series.total)
+                for key, series in self.series.items()
+            }
+        lines = []
+        for name, help_text in METRICS:
+            metric = f"yatube_{name}"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} summary")
+            for (series_name, view), (quantiles, count, total) in sorted(
+                snapshot.items()
+            ):
+                if series_name != name:
+                    continue
+                for quantile, value in quantiles:
+                    lines.append(
+                        f'{metric}{{view="{view}",quantile="{quantile}"}} '
+                        f"{value:.6g}"
+                    )
+                lines.append(f'{metric}_sum{{view="{view}"}} {total:.6g}')
+                lines.append(f'{metric}_count{{view="{view}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry(settings.METRICS_WINDOW)
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sample = _local.sample = Sample()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(sample)
+                    )
+                response = self.get_response(request)
+        finally:
+            _local.sample = None
+        match = request.resolver_match
+        if match is not None and match.url_name:
+            registry.record(
+                match.url_name, sample, time.perf_counter() - started
+            )
+        return response
+
+
+class Template(django_backend.Template):
+    def render(self, context=None, request=None):
+        sample = getattr(_local, "sample", None)
+        if sample is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        sql_time = sample.sql_time
+        try:
+            return super().render(context, request)
+        finally:
+            # Ленивые QuerySet выполняются при рендеринге; их время уже
+            # учтено в SQL, поэтому из времени шаблона оно вычитается.
+            sample.template_time += (
+                time.perf_counter() - started - (sample.sql_time - sql_time)
+            )
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """Бэкенд Django-шаблонов, замеряющий время рендеринга для метрик."""
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except django_backend.TemplateDoesNotExist as exc:
+            django_backend.reraise(exc, self)
+
+
+@staff_member_required
+def metrics_view(request):
+    return HttpResponse(registry.render(),
+                        content_type="text/plain; version=0.0.4")
@@ -0,0 +1,54 @@
+# Generated by Django 2.2.6 on 2026-10-18 06:07
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_counters(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    PostCounter = apps.get_model('posts', 'PostCounter')
+    posts = Post.objects.using(schema_editor.connection.alias)
+    counters = [PostCounter(scope='all', count=posts.count())]
+    for field in ('author', 'group'):
+        rows = posts.filter(**{f'{field}__isnull': False}).order_by(
+        ).values(field).annotate(total=Count('id'))
+        counters.extend(
+            PostCounter(scope=f'{field}:{row[field]}', count=row['total'])
+            for row in rows
+        )
+    PostCounter.objects.using(schema_editor.connection.alias).bulk_create(
+        counters
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_auto_20201230_0729'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=64, unique=True)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterModelOptions(
+            name='post',
+            options={'ordering': ['-pub_date']},
+        ),
+        migrations.AlterField(
+            model_name='group',
+            name='description',
+            field=models.TextField(help_text='Описание группы. Не более 400 символов.', max_length=400, verbose_name='Описание'),
+        ),
+        migrations.AlterField(
+            model_name='group',
+            name='title',
+            field=models.CharField(help_text='Укажите заголовок', max_length=200, verbose_name='Заголовок'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 2.2.6 on 2026-10-18 06:43
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_follow_timelineentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64)),
+                ('payload', models.TextField(default='{}')),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('locked_by', models.CharField(blank=True, max_length=32)),
+                ('failed', models.BooleanField(default=False)),
+                ('last_error', models.TextField(blank=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['failed', 'run_at'], name='job_due_idx'),
+        ),
+    ]
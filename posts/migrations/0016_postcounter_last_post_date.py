@@ -0,0 +1,37 @@
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def fill_last_post_date(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    Post = apps.get_model('posts', 'Post')
+    PostCounter = apps.get_model('posts', 'PostCounter')
+    posts = Post.objects.using(alias).order_by()
+    counters = PostCounter.objects.using(alias)
+    counters.filter(scope='all').update(
+        last_post_date=posts.aggregate(last=Max('pub_date'))['last']
+    )
+    for field in ('author', 'group'):
+        rows = posts.filter(**{f'{field}__isnull': False}).values(
+            field
+        ).annotate(last=Max('pub_date'))
+        for row in rows:
+            counters.filter(scope=f'{field}:{row[field]}').update(
+                last_post_date=row['last']
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='postcounter',
+            name='last_post_date',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(fill_last_post_date, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,9 @@
+from contextlib import contextmanager
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, router, transaction
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -19,10 +23,83 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    # Колонки, которые шаблоны лент никогда не читают.
+    FEED_DEFERRED_FIELDS = (
+        "author__password",
+        "author__last_login",
+        "author__is_superuser",
+        "author__is_staff",
+        "author__is_active",
+        "author__email",
+        "author__date_joined",
+        "group__description",
+    )
+
+    def feed(self):
+        """Записи для лент: автор и группа подгружаются одним JOIN."""
+        return self.select_related("author", "group").defer(
+            *self.FEED_DEFERRED_FIELDS
+        )
+
+    _count_scope = None
+
+    def count_from(self, scope):
+        """
+        Разрешает count() брать значение из счётчика PostCounter.
+
+        Счётчик используется, только если он не меньше
+        POSTS_ESTIMATED_COUNT_THRESHOLD: на небольших выборках (например,
+        одной группе) точный COUNT(*) дёшев и выполняется как обычно.
+        Любой дополнительный filter(), exclude() или extra() с условиями,
+        как и none(), сбрасывает оценку.
+        """
+        clone = self._chain()
+        clone._count_scope = scope
+        return clone
+
+    def count(self):
+        if self._count_scope is not None and self._result_cache is None:
+            from .counters import get_count
+
+            estimate = get_count(self._count_scope)
+            if estimate >= settings.POSTS_ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count()
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._count_scope = self._count_scope
+        return clone
+
+    def none(self):
+        clone = super().none()
+        clone._count_scope = None
+        return clone
+
+    def extra(self, select=None, where=None, params=None, tables=None,
+              order_by=None, select_params=None):
+        clone = super().extra(select, where, params, tables, order_by,
+                              select_params)
+        # Так выборку сужает, например, поиск по индексу (posts.search).
+        if where or tables:
+            clone._count_scope = None
+        return clone
+
+    def _filter_or_exclude(self, negate, *args, **kwargs):
+        clone = super()._filter_or_exclude(negate, *args, **kwargs)
+        # Пустой filter() (его, например, всегда вызывает список объектов
+        # в админке) выборку не меняет.
+        if args or kwargs:
+            clone._count_scope = None
+        return clone
+
+
 class Post(models.Model):
     text = models.TextField(verbose_name='Текст записи',
                             help_text='Укажите текст Вашей записи.')
     pub_date = models.DateTimeField("date published", auto_now_add=True)
+    updated_at = models.DateTimeField("date updated", auto_now=True)
     author = models.ForeignKey(User, on_delete=models.CASCADE,
                                related_name="posts")
     group = models.ForeignKey(Group,
@@ -33,9 +110,141 @@ class Post(models.Model):
                               null=True,
                               help_text=('Выберете группу, в которой хотите '
                                          'опубликовать Вашу запись.'))
+    # Без width_field/height_field: размеры читались бы из файла при
+    # каждом сохранении.
+    image = models.ImageField(verbose_name='Изображение',
+                              upload_to='posts/',
+                              blank=True)
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
-        ordering = ['-pub_date']
+        ordering = ['-pub_date', '-id']
+        # Каждой ленте — свой индекс в порядке её сортировки, чтобы SQLite
+        # не строил временное B-дерево для ORDER BY.
+        indexes = [
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_pub_date_idx'),
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_pub_date_idx'),
+            models.Index(fields=['-pub_date', '-id'],
+                         name='post_pub_date_idx'),
+        ]
 
     def __str__(self):
         return self.text[:15]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Значения из БД нужны обработчикам сигналов, чтобы перенести
+        # запись между счётчиками при смене автора или группы.
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Задача post_save попадает в очередь в той же транзакции, что и
+        # запись: нет записи без задачи и задачи без записи.
+        using = kwargs.get("using") or router.db_for_write(
+            type(self), instance=self
+        )
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+
+
+@contextmanager
+def explicit_pub_date():
+    """
+    Отключает auto_now_add у Post.pub_date, чтобы сохранить дату из данных.
+
+    Меняет поле модели для всего процесса, поэтому предназначено только
+    для management-команд массовой загрузки.
+    """
+    field = Post._meta.get_field("pub_date")
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+class PostCounter(models.Model):
+    """
+    Денормализованные счётчики: записи в ленте (всего, автора, группы)
+    с датой последней из них, подписчики и подписки автора.
+    """
+
+    scope = models.CharField(max_length=64, unique=True)
+    count = models.PositiveIntegerField(default=0)
+    # Дата последней записи в ленте области; у счётчиков подписок пусто.
+    last_post_date = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.scope}: {self.count}"
+
+
+class Follow(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE,
+                             related_name="follower")
+    author = models.ForeignKey(User, on_delete=models.CASCADE,
+                               related_name="following")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "author"],
+                                    name="unique_follow"),
+        ]
+
+    def __str__(self):
+        return f"{self.user} -> {self.author}"
+
+
+class TimelineEntry(models.Model):
+    """
+    Запись в ленте подписок пользователя, разложенная при публикации.
+
+    pub_date копирует дату записи, чтобы страница ленты читалась одним
+    проходом по индексу (user, -pub_date, -post).
+    """
+
+    # Отдельный индекс по user не нужен: его покрывают составные.
+    user = models.ForeignKey(User, on_delete=models.CASCADE,
+                             related_name="+", db_index=False)
+    post = models.ForeignKey(Post, on_delete=models.CASCADE,
+                             related_name="timeline_entries")
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "post"],
+                                    name="unique_timeline_entry"),
+        ]
+        indexes = [
+            models.Index(fields=["user", "-pub_date", "-post"],
+                         name="timeline_user_pub_date_idx"),
+        ]
+
+
+class Job(models.Model):
+    """
+    Фоновая задача posts.jobs: имя обработчика и JSON-параметры.
+
+    Выполненные задачи удаляются, в таблице остаются ожидающие и
+    упавшие (failed) после всех попыток.
+    """
+
+    name = models.CharField(max_length=64)
+    payload = models.TextField(default="{}")
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    locked_by = models.CharField(max_length=32, blank=True)
+    failed = models.BooleanField(default=False)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["failed", "run_at"], name="job_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk}"
@@ -0,0 +1,140 @@
+import base64
+import binascii
+from collections.abc import Sequence
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+NEXT = "n"
+PREVIOUS = "p"
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(post, direction):
+    raw = f"{direction}|{post.pub_date.isoformat()}|{post.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        direction, pub_date, pk = raw.split("|")
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise InvalidCursor(token)
+    if direction not in (NEXT, PREVIOUS) or pub_date is None:
+        raise InvalidCursor(token)
+    return direction, pub_date, pk
+
+
+class CursorPage(Sequence):
+    def __init__(self, object_list, paginator, next_cursor=None,
+                 previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f"<CursorPage of {len(self)} objects>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Постраничная навигация по ключу (pub_date, id) вместо OFFSET.
+
+    Каждая страница — это один запрос `WHERE (pub_date, id) < курсор
+    ORDER BY pub_date DESC, id DESC LIMIT per_page + 1` без COUNT(*),
+    поэтому глубокие страницы выбираются так же быстро, как первая.
+    """
+
+    is_cursor = True
+    ordering = ("-pub_date", "-pk")
+
+    def __init__(self, object_list, per_page):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+
+    def get_page(self, cursor):
+        try:
+            direction, pub_date, pk = decode_cursor(cursor or "")
+        except InvalidCursor:
+            return self._first_page()
+
+        queryset = self.object_list.order_by(*self.ordering)
+        if direction == NEXT:
+            rows = list(queryset.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+            )[:self.per_page + 1])
+            has_more = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            if not rows:
+                return self._first_page()
+            return CursorPage(
+                rows, self,
+                next_cursor=self._cursor(rows[-1], NEXT, has_more),
+                previous_cursor=self._cursor(rows[0], PREVIOUS),
+            )
+
+        rows = list(queryset.filter(
+            Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, pk__gt=pk)
+        ).reverse()[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page][::-1]
+        if not rows:
+            return self._first_page()
+        return CursorPage(
+            rows, self,
+            next_cursor=self._cursor(rows[-1], NEXT),
+            previous_cursor=self._cursor(rows[0], PREVIOUS, has_more),
+        )
+
+    def _first_page(self):
+        rows = list(
+            self.object_list.order_by(*self.ordering)[:self.per_page + 1]
+        )
+        if len(rows) <= self.per_page:
+            return CursorPage(rows, self)
+        rows = rows[:self.per_page]
+        return CursorPage(
+            rows, self, next_cursor=self._cursor(rows[-1], NEXT)
+        )
+
+    @staticmethod
+    def _cursor(post, direction, exists=True):
+        return encode_cursor(post, direction) if exists else None
+
+
+def paginate(request, object_list, per_page):
+    """
+    Возвращает пару (paginator, page).
+
+    При наличии `?cursor=` в запросе используется навигация по ключу,
+    иначе — обычный Paginator с `?page=`.
+    """
+    if "cursor" in request.GET:
+        paginator = CursorPaginator(object_list, per_page)
+        return paginator, paginator.get_page(request.GET["cursor"])
+    paginator = Paginator(object_list, per_page)
+    return paginator, paginator.get_page(request.GET.get("page"))
@@ -0,0 +1,92 @@
+"""
+Разрешение строк из URL: username → id пользователя, slug → группа.
+
+Значения живут в LRU процесса с коротким TTL, под ним — общий кэш
+POSTS_CACHE_ALIAS, и только потом база. Сигналы сохранения и удаления
+User и Group сбрасывают общий кэш и LRU своего процесса; LRU остальных
+процессов догоняют не позже чем через POSTS_RESOLVER_TTL секунд.
+Отсутствие объекта тоже кэшируется: регистрация сбросит его сигналом.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import router, transaction
+
+from . import caching
+from .models import Group, User
+
+_missing = object()
+
+
+class Resolver:
+    def __init__(self, name, load):
+        self.name = name
+        self.load = load
+        self._lock = threading.Lock()
+        self._local = OrderedDict()
+
+    def _key(self, value):
+        return f"posts:resolve:{self.name}:{value}"
+
+    def get(self, value):
+        now = time.monotonic()
+        with self._lock:
+            expires, result = self._local.get(value, (0, None))
+            if expires > now:
+                self._local.move_to_end(value)
+                return result
+
+        cache = caching.get_cache()
+        result = cache.get(self._key(value), _missing)
+        if result is _missing:
+            result = self.load(value)
+            cache.set(self._key(value), result,
+                      settings.POSTS_RESOLVER_CACHE_TIMEOUT)
+
+        with self._lock:
+            self._local[value] = (now + settings.POSTS_RESOLVER_TTL, result)
+            self._local.move_to_end(value)
+            while len(self._local) > settings.POSTS_RESOLVER_SIZE:
+                self._local.popitem(last=False)
+        return result
+
+    def invalidate(self, *values):
+        caching.get_cache().delete_many([self._key(value) for value in values])
+        with self._lock:
+            for value in values:
+                self._local.pop(value, None)
+
+    def invalidate_on_commit(self, *values):
+        # Как caching.bump_on_commit: чтение до фиксации транзакции могло
+        # снова положить в кэш старое значение.
+        self.invalidate(*values)
+        transaction.on_commit(lambda: self.invalidate(*values))
+
+
+# Значения читаются из основной базы: ответ отстающей реплики (ещё нет
+# нового пользователя, старый slug) попал бы в общий кэш на
+# POSTS_RESOLVER_CACHE_TIMEOUT уже после сброса по сигналу.
+def _load_user_id(username):
+    return User.objects.db_manager(router.db_for_write(User)).filter(
+        username=username
+    ).values_list("pk", flat=True).first()
+
+
+def _load_group(slug):
+    return Group.objects.db_manager(router.db_for_write(Group)).filter(
+        slug=slug
+    ).first()
+
+
+user_ids = Resolver("username", _load_user_id)
+groups = Resolver("slug", _load_group)
+
+
+def user_id(username):
+    return user_ids.get(username)
+
+
+def group(slug):
+    return groups.get(slug)
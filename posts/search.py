@@ -0,0 +1,123 @@
+from django.db import connections, router, transaction
+
+from .models import Post
+
+FTS_TABLE = "posts_post_fts"
+
+
+def _connection():
+    return connections[router.db_for_write(Post)]
+
+
+def is_supported(connection=None):
+    return (connection or _connection()).vendor == "sqlite"
+
+
+def create_index(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+            "USING fts5(text, tokenize='unicode61 remove_diacritics 2')"
+        )
+
+
+def drop_index(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def normalize(text):
+    # unicode61 не сводит «ё» к «е», поэтому это делается до индексации.
+    return text.replace("ё", "е").replace("Ё", "Е")
+
+
+def index_posts(rows):
+    """Добавляет или обновляет в индексе пары (id, text)."""
+    connection = _connection()
+    if not is_supported(connection):
+        return
+    rows = [(pk, normalize(text)) for pk, text in rows]
+    # Без транзакции SQLite фиксирует каждую строку executemany отдельно.
+    with transaction.atomic(using=connection.alias):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid = %s",
+                [(pk,) for pk, _ in rows],
+            )
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)",
+                rows,
+            )
+
+
+def unindex_post(pk):
+    connection = _connection()
+    if not is_supported(connection):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [pk])
+
+
+def rebuild(chunk_size=2000):
+    connection = _connection()
+    if not is_supported(connection):
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+    rows = Post.objects.order_by().values_list("id", "text").iterator(
+        chunk_size=chunk_size
+    )
+    total = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == chunk_size:
+            index_posts(batch)
+            total += len(batch)
+            batch = []
+    index_posts(batch)
+    return total + len(batch)
+
+
+def match_expression(text):
+    """
+    Экранирует запрос: каждое слово ищется как префикс, все слова
+    должны встретиться в записи («ежик» найдёт и «Ёжика»).
+    """
+    words = normalize(text).split()
+    return " ".join('"{}"*'.format(word.replace('"', '""')) for word in words)
+
+
+def filter_posts(queryset, text):
+    """Оставляет в queryset записи, найденные по индексу."""
+    expression = match_expression(text)
+    if not expression:
+        return queryset.none()
+    if not is_supported():
+        return queryset.filter(text__icontains=text)
+    return queryset.extra(
+        where=[
+            f"{Post._meta.db_table}.id IN (SELECT rowid FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s)"
+        ],
+        params=[expression],
+    )
+
+
+def rank_posts(queryset, text):
+    """Найденные записи, упорядоченные по bm25: лучшие совпадения первыми."""
+    expression = match_expression(text)
+    if not expression:
+        return queryset.none()
+    if not is_supported():
+        return queryset.filter(text__icontains=text)
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[
+            f"{FTS_TABLE}.rowid = {Post._meta.db_table}.id",
+            f"{FTS_TABLE} MATCH %s",
+        ],
+        params=[expression],
+        select={"rank": f"bm25({FTS_TABLE})"},
+        order_by=["rank", "-pub_date"],
+    )
@@ -0,0 +1,120 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import caching, counters, jobs, resolvers, tasks, timeline
+from .models import Follow, Group, Post, User
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    new_scopes = counters.post_scopes(instance.author_id, instance.group_id)
+    old_scopes = []
+    image_changed = created
+    if not created:
+        loaded = getattr(instance, "_loaded_values", {})
+        old_scopes = counters.post_scopes(
+            loaded.get("author_id", instance.author_id),
+            loaded.get("group_id", instance.group_id),
+        )
+        # Отложенное поле image не сохранялось, а значит, не менялось.
+        image_changed = (
+            "image" not in instance.get_deferred_fields()
+            and loaded.get("image") != instance.image.name
+        )
+        instance._loaded_values = dict(
+            loaded, author_id=instance.author_id, group_id=instance.group_id
+        )
+    if "image" not in instance.get_deferred_fields():
+        instance._loaded_values = dict(
+            getattr(instance, "_loaded_values", {}), image=instance.image.name
+        )
+    # Версии кэша сбрасываются сразу, чтобы автор увидел запись после
+    # redirect; счётчики, поиск и ленты подписчиков обновит задача.
+    caching.bump_on_commit(*set(old_scopes) | set(new_scopes))
+    jobs.enqueue(
+        tasks.POST_CHANGED, post=instance.pk, created=created,
+        image_changed=image_changed,
+        added=sorted(set(new_scopes) - set(old_scopes)),
+        removed=sorted(set(old_scopes) - set(new_scopes)),
+    )
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    scopes = counters.post_scopes(instance.author_id, instance.group_id)
+    caching.bump_on_commit(*scopes)
+    jobs.enqueue(tasks.POST_CHANGED, post=instance.pk, created=False,
+                 added=[], removed=scopes)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    caching.bump_on_commit(counters.group_scope(instance.pk),
+                           caching.GROUP_DIRECTORY)
+    old = getattr(instance, "_stored_url_key", None)
+    resolvers.groups.invalidate_on_commit(
+        *{instance.slug, old or instance.slug}
+    )
+
+
+def _stored_value(sender, instance, field, update_fields):
+    if instance.pk is None or (update_fields is not None
+                               and field not in update_fields):
+        return None
+    return sender.objects.filter(pk=instance.pk).values_list(
+        field, flat=True
+    ).first()
+
+
+@receiver(pre_save, sender=User)
+@receiver(pre_save, sender=Group)
+def key_changing(sender, instance, update_fields, raw, **kwargs):
+    # Старые username и slug тоже нужно сбросить, если их сменили.
+    field = "username" if sender is User else "slug"
+    instance._stored_url_key = (
+        None if raw else _stored_value(sender, instance, field,
+                                       update_fields)
+    )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    old = getattr(instance, "_stored_url_key", None)
+    resolvers.user_ids.invalidate_on_commit(
+        *{instance.username, old or instance.username}
+    )
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw, **kwargs):
+    if raw or not created:
+        return
+    counters.change([counters.followers_scope(instance.author_id)], 1)
+    counters.change([counters.follows_scope(instance.user_id)], 1)
+    timeline.backfill(instance.user_id, instance.author_id)
+    caching.bump_on_commit(counters.author_scope(instance.author_id),
+                           counters.author_scope(instance.user_id))
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.change([counters.followers_scope(instance.author_id)], -1)
+    counters.change([counters.follows_scope(instance.user_id)], -1)
+    timeline.remove(instance.user_id, instance.author_id)
+    caching.bump_on_commit(counters.author_scope(instance.author_id),
+                           counters.author_scope(instance.user_id))
+
+
+@receiver(connection_created)
+def tune_sqlite(sender, connection, **kwargs):
+    if connection.vendor != "sqlite" or not settings.SQLITE_PRAGMAS:
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
@@ -0,0 +1,66 @@
+"""
+Потоковая отрисовка длинных страниц лент.
+
+Шаблон страницы рендерится один раз с меткой на месте списка записей и
+режется по ней. Всё до метки — <head>, навигация, карточка автора —
+уходит клиенту сразу, затем по блоку на запись по мере чтения записей
+из базы итератором, затем хвост с паджинатором. Ни вся страница, ни
+весь список записей не держатся в памяти целиком.
+"""
+from django.conf import settings
+from django.db import router
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+from django.template import Context
+from django.template.loader import get_template, render_to_string
+from django.utils.safestring import mark_safe
+
+# Текст записей экранируется, поэтому метка не может прийти из данных.
+MARKER = "<!-- posts:stream -->"
+
+
+def per_page(request, default):
+    """Размер страницы из ?per_page=, если он из POSTS_PER_PAGE_CHOICES."""
+    try:
+        value = int(request.GET.get("per_page", default))
+    except ValueError:
+        return default
+    return value if value in settings.POSTS_PER_PAGE_CHOICES else default
+
+
+def is_streamed(page_size):
+    return page_size >= settings.POSTS_STREAM_PER_PAGE
+
+
+def stream_page(request, template_name, context, item_template):
+    """
+    StreamingHttpResponse со страницей template_name.
+
+    Шаблон выводит {{ stream_marker }} вместо цикла по page; item_template
+    рендерится для каждой записи с переменными post, author и forloop.
+    """
+    html = render_to_string(
+        template_name, dict(context, stream_marker=mark_safe(MARKER)),
+        request,
+    )
+    head, _, tail = html.partition(MARKER)
+    posts = context["page"].object_list
+    if isinstance(posts, QuerySet):
+        # Тело ответа читается уже после middleware, которое выбирает
+        # базу для чтения, поэтому база фиксируется сейчас.
+        posts = posts.using(router.db_for_read(posts.model)).iterator(
+            chunk_size=settings.POSTS_STREAM_CHUNK_SIZE
+        )
+    template = get_template(item_template).template
+    item_context = Context({"user": request.user, "request": request})
+
+    def chunks():
+        yield head
+        for number, post in enumerate(posts):
+            forloop = {"counter": number + 1, "first": number == 0}
+            with item_context.push(post=post, author=post.author,
+                                   forloop=forloop):
+                yield template.render(item_context)
+        yield tail
+
+    return StreamingHttpResponse(chunks())
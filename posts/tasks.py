@@ -0,0 +1,99 @@
+"""Фоновые задачи записей: счётчики, поиск, ленты подписок, письма."""
+from collections import Counter
+
+from django.conf import settings
+from django.core.mail import send_mass_mail
+from django.urls import reverse
+
+from . import caching, counters, jobs, search, thumbnails, timeline
+from .models import Follow, Post
+
+POST_CHANGED = "post_changed"
+NOTIFY_FOLLOWERS = "notify_followers"
+GENERATE_THUMBNAILS = "generate_thumbnails"
+
+
+@jobs.handler(POST_CHANGED)
+def post_changed(payloads):
+    """
+    Параметры задачи: post, created, image_changed и области счётчиков
+    added/removed, в которые запись попала или из которых ушла.
+    """
+    deltas = Counter()
+    for payload in payloads:
+        deltas.update(payload["added"])
+        deltas.subtract(payload["removed"])
+    for scope, delta in deltas.items():
+        if delta:
+            counters.change([scope], delta)
+    counters.refresh_last_post_dates(deltas)
+
+    ids = {payload["post"] for payload in payloads}
+    posts = Post.objects.only("text", "author", "pub_date", "image").in_bulk(
+        ids
+    )
+    # Текст берётся из базы, а не из параметров: повтор старой задачи
+    # не вернёт в индекс устаревшую версию записи.
+    search.index_posts([(pk, post.text) for pk, post in posts.items()])
+    for pk in ids - set(posts):
+        search.unindex_post(pk)
+
+    for payload in payloads:
+        post = posts.get(payload["post"])
+        if post is None:
+            continue
+        if payload["created"]:
+            timeline.fan_out(post)
+            jobs.enqueue(NOTIFY_FOLLOWERS, post=post.pk)
+        # Задачи, поставленные до появления image_changed, строят
+        # миниатюры как раньше.
+        if post.image and payload.get("image_changed", True):
+            jobs.enqueue(GENERATE_THUMBNAILS, post=post.pk)
+    caching.bump_on_commit(*deltas)
+
+
+@jobs.handler(NOTIFY_FOLLOWERS)
+def notify_followers(payloads):
+    """Письма подписчикам о новой записи через EMAIL_BACKEND."""
+    posts = Post.objects.select_related("author").filter(
+        pk__in=[payload["post"] for payload in payloads]
+    )
+    messages = []
+    for post in posts:
+        # Подписчиков популярного автора слишком много для рассылки
+        # на каждую запись, как и для раскладки по лентам.
+        if not timeline.is_fanned_out(post.author_id):
+            continue
+        author = post.author
+        subject = f"Новая запись: {author.get_full_name() or author.username}"
+        url = settings.POSTS_SITE_URL + reverse(
+            "post", args=[author.username, post.pk]
+        )
+        body = f"{post.text}\n\n{url}"
+        emails = Follow.objects.filter(author_id=post.author_id).exclude(
+            user__email=""
+        ).values_list("user__email", flat=True)
+        messages.extend((subject, body, None, [email]) for email in emails)
+    # Одно соединение с почтовым сервером на всю пачку.
+    send_mass_mail(messages)
+
+
+def request_thumbnails(post_id):
+    """Ставит задачу на миниатюры записи, если её не ставили недавно."""
+    key = f"posts:thumbnails:{post_id}"
+    if caching.get_cache().add(key, True, settings.POSTS_JOBS_LEASE):
+        jobs.enqueue(GENERATE_THUMBNAILS, post=post_id)
+
+
+@jobs.handler(GENERATE_THUMBNAILS)
+def generate_thumbnails(payloads):
+    posts = Post.objects.filter(
+        pk__in=[payload["post"] for payload in payloads]
+    ).exclude(image="").only("image", "author", "group")
+    scopes = set()
+    for post in posts:
+        thumbnails.generate(post.image)
+        scopes.update(counters.post_scopes(post.author_id, post.group_id))
+    # Фрагменты лент, отрисованные с исходным файлом, перерисуются
+    # уже с миниатюрами.
+    caching.bump_on_commit(*scopes)
@@ -0,0 +1,43 @@
+from django import template
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def page_url(context, value, param="page"):
+    """Ссылка на другую страницу с сохранением остальных GET-параметров."""
+    query = context["request"].GET.copy()
+    query.pop("page", None)
+    query.pop("cursor", None)
+    query[param] = value
+    return "?" + query.urlencode()
+
+
+@register.simple_tag
+def page_window(page, on_each_side=2, on_ends=1):
+    """
+    Номера страниц вокруг текущей и по краям; None обозначает пропуск.
+
+    Для 50 000 страниц вернёт, например, [1, None, 9, 10, 11, 12, 13,
+    None, 50000] вместо полного page_range.
+    """
+    number = page.number
+    num_pages = page.paginator.num_pages
+    if num_pages <= (on_each_side + on_ends) * 2 + 1:
+        return list(range(1, num_pages + 1))
+
+    window = []
+    if number > on_each_side + on_ends + 1:
+        window.extend(range(1, on_ends + 1))
+        window.append(None)
+        window.extend(range(number - on_each_side, number + 1))
+    else:
+        window.extend(range(1, number + 1))
+
+    if number < num_pages - on_each_side - on_ends:
+        window.extend(range(number + 1, number + on_each_side + 1))
+        window.append(None)
+        window.extend(range(num_pages - on_ends + 1, num_pages + 1))
+    else:
+        window.extend(range(number + 1, num_pages + 1))
+    return window
@@ -0,0 +1,24 @@
+from django import template
+from django.conf import settings
+
+from posts import tasks, thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_thumbnail(image, size="feed"):
+    """
+    Готовая миниатюра изображения записи или None.
+
+    Недостающую миниатюру строит задача posts.jobs, а шаблон до тех пор
+    показывает исходный файл: лента не декодирует изображения. В режиме
+    "eager" задача выполнилась бы прямо здесь, при отрисовке, поэтому
+    её не ставят: миниатюры строятся при сохранении записи.
+    """
+    if not image:
+        return None
+    thumbnail = thumbnails.get_cached(image, size)
+    if thumbnail is None and settings.POSTS_JOBS_MODE != "eager":
+        tasks.request_thumbnails(image.instance.pk)
+    return thumbnail
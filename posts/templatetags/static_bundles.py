@@ -0,0 +1,28 @@
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+from django.utils.html import format_html_join
+
+register = template.Library()
+
+
+@register.simple_tag
+def static_bundle(name):
+    """
+    Теги <link> или <script> для связки из STATIC_BUNDLES.
+
+    Если collectstatic склеил связку (BundledManifestStorage), это один
+    файл; иначе, например при разработке или до первого collectstatic,
+    — исходные файлы по одному.
+    """
+    if (getattr(staticfiles_storage, "bundles", False)
+            and name in staticfiles_storage.hashed_files):
+        paths = [name]
+    else:
+        paths = settings.STATIC_BUNDLES[name]
+    if name.endswith(".css"):
+        tag = '<link rel="stylesheet" href="{}">'
+    else:
+        tag = '<script src="{}"></script>'
+    return format_html_join("\n    ", tag, ((static(path),) for path in paths))
@@ -0,0 +1,281 @@
+import csv
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import CommandError, call_command
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from posts import counters, search
+from posts.models import Group, Post
+from yatube.staticfiles import IMMUTABLE, MUTABLE, StaticFilesMiddleware
+
+
+class ImportPostsCommandTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create(username='testuser')
+        cls.group = Group.objects.create(title='Тестовая группа',
+                                         slug='test-group',
+                                         description='Описание')
+
+    def write_file(self, suffix, content):
+        descriptor, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as stream:
+            stream.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_import_jsonl_keeps_pub_date(self):
+        """JSONL загружается пачками с датой публикации из файла."""
+        rows = [
+            {'text': f'Запись {number}', 'author': 'testuser',
+             'group': 'test-group',
+             'pub_date': f'2015-01-{number + 1:02d}T10:00:00+00:00'}
+            for number in range(5)
+        ]
+        path = self.write_file(
+            '.jsonl', '\n'.join(json.dumps(row) for row in rows)
+        )
+        call_command('import_posts', path, batch_size=2, stdout=StringIO())
+
+        self.assertEqual(Post.objects.count(), 5)
+        newest = Post.objects.first()
+        self.assertEqual(newest.text, 'Запись 4')
+        self.assertEqual(newest.pub_date.year, 2015)
+        self.assertEqual(newest.group, self.group)
+        self.assertEqual(
+            counters.get_count(counters.group_scope(self.group.id)), 5
+        )
+        self.assertEqual(
+            search.filter_posts(Post.objects.all(), 'Запись').count(), 5
+        )
+
+    def test_import_csv_skips_unknown_authors_and_groups(self):
+        """Строки с неизвестным автором или группой пропускаются."""
+        path = self.write_file(
+            '.csv',
+            'text,author,group,pub_date\n'
+            'Первая,testuser,,\n'
+            'Вторая,nobody,,\n'
+            'Третья,testuser,no-group,\n'
+        )
+        out = StringIO()
+        call_command('import_posts', path, stdout=out)
+
+        self.assertEqual(list(Post.objects.values_list('text', flat=True)),
+                         ['Первая'])
+        self.assertIn('пропущено 2', out.getvalue())
+        # Запись без pub_date получает текущее время, как при auto_now_add.
+        self.assertIsNotNone(Post.objects.get().pub_date)
+        self.assertTrue(Post._meta.get_field('pub_date').auto_now_add)
+
+    def test_import_csv_keeps_line_breaks_in_quoted_fields(self):
+        """Переводы строк внутри кавычек CSV сохраняются как есть."""
+        path = self.write_file(
+            '.csv',
+            'text,author\r\n"Первая строка\r\nвторая строка",testuser\r\n'
+        )
+        call_command('import_posts', path, stdout=StringIO())
+        self.assertEqual(Post.objects.get().text,
+                         'Первая строка\r\nвторая строка')
+
+    def test_import_jsonl_rejects_non_objects(self):
+        """Строка JSONL не с объектом — ошибка с номером строки."""
+        path = self.write_file(
+            '.jsonl', '{"text": "Запись", "author": "testuser"}\n[1, 2]\n'
+        )
+        with self.assertRaisesMessage(CommandError, 'Строка 2'):
+            call_command('import_posts', path, stdout=StringIO())
+
+
+class ExportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create(username='testuser')
+        cls.group = Group.objects.create(title='Тестовая группа',
+                                         slug='test-group',
+                                         description='Описание')
+        cls.posts = [
+            Post.objects.create(text='Первая запись', author=cls.user,
+                                group=cls.group),
+            Post.objects.create(text='Вторая запись', author=cls.user),
+        ]
+
+    def export_to_file(self, suffix, **options):
+        descriptor, path = tempfile.mkstemp(suffix=suffix)
+        os.close(descriptor)
+        self.addCleanup(os.remove, path)
+        call_command('export_posts', path, **options)
+        return path
+
+    def test_export_jsonl(self):
+        """Выгрузка в JSONL совместима с форматом import_posts."""
+        path = self.export_to_file('.jsonl')
+        with open(path, encoding='utf-8') as stream:
+            rows = [json.loads(line) for line in stream]
+        self.assertEqual(
+            [(row['text'], row['author'], row['group']) for row in rows],
+            [('Первая запись', 'testuser', 'test-group'),
+             ('Вторая запись', 'testuser', None)],
+        )
+
+    def test_export_csv_gzip(self):
+        """Выгрузка в CSV сжимается в gzip."""
+        path = self.export_to_file('.csv.gz', format='csv', gzip=True)
+        with gzip.open(path, 'rt', encoding='utf-8') as stream:
+            rows = list(csv.DictReader(stream))
+        self.assertEqual([row['text'] for row in rows],
+                         ['Первая запись', 'Вторая запись'])
+        self.assertEqual(rows[0]['group'], 'test-group')
+
+    def test_admin_export_action_streams_response(self):
+        """Действие в админке отдаёт потоковый ответ в gzip."""
+        admin = get_user_model().objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        client = Client()
+        client.force_login(admin)
+        response = client.post(reverse('admin:posts_post_changelist'), {
+            'action': 'export_jsonl',
+            '_selected_action': [post.pk for post in self.posts],
+        })
+        self.assertTrue(response.streaming)
+        content = gzip.decompress(b''.join(response.streaming_content))
+        self.assertEqual(len(content.decode().splitlines()), 2)
+
+
+class FlattenTemplatesTest(TestCase):
+    def setUp(self):
+        self.output = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output)
+
+    def test_static_includes_are_inlined(self):
+        """Постоянные include заменяются текстом, шаблоны с блоками — нет."""
+        call_command('flatten_templates', output=self.output,
+                     stdout=StringIO())
+        path = os.path.join(self.output, 'posts', 'profile.html')
+        with open(path, encoding='utf-8') as stream:
+            profile = stream.read()
+        self.assertNotIn('{% include "posts_view.html" %}', profile)
+        self.assertNotIn('{% include "posts_author.html" %}', profile)
+        self.assertIn('{% extends "base.html" %}', profile)
+
+
+class CollectStaticTest(TestCase):
+    SOURCES = {
+        'bootstrap/dist/css/bootstrap.min.css': 'body{margin:0}\n' * 100,
+        'jquery/dist/jquery.min.js': 'var jQuery={};\n' * 100,
+        'bootstrap/dist/js/bootstrap.min.js': 'var bootstrap={};\n' * 100,
+    }
+
+    def setUp(self):
+        source = tempfile.mkdtemp()
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, source)
+        self.addCleanup(shutil.rmtree, root)
+        for name, content in self.SOURCES.items():
+            path = os.path.join(source, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as stream:
+                stream.write(content)
+        settings = override_settings(
+            STATICFILES_DIRS=[source],
+            STATIC_ROOT=root,
+            STATICFILES_STORAGE='yatube.staticfiles.BundledManifestStorage',
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        call_command('collectstatic', interactive=False, verbosity=0,
+                     ignore_patterns=['admin'])
+        self.root = root
+
+    def serve(self, name, encoding=''):
+        middleware = StaticFilesMiddleware(lambda request: HttpResponse())
+        return middleware(RequestFactory().get(
+            '/static/' + name, HTTP_ACCEPT_ENCODING=encoding
+        ))
+
+    def test_bundles_are_hashed_and_precompressed(self):
+        """Связки склеиваются, хешируются и получают сжатые копии."""
+        name = staticfiles_storage.stored_name('bundles/site.js')
+        self.assertNotEqual(name, 'bundles/site.js')
+        with gzip.open(os.path.join(self.root, name + '.gz')) as stream:
+            bundle = stream.read().decode()
+        self.assertIn(self.SOURCES['jquery/dist/jquery.min.js'], bundle)
+        self.assertIn(self.SOURCES['bootstrap/dist/js/bootstrap.min.js'],
+                      bundle)
+
+        html = Template(
+            '{% load static_bundles %}{% static_bundle "bundles/site.js" %}'
+        ).render(Context())
+        self.assertEqual(html, f'<script src="/static/{name}"></script>')
+
+    def test_bundle_falls_back_to_sources_before_collectstatic(self):
+        """Без манифеста связка выводится исходными файлами, а не 500."""
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        with override_settings(STATIC_ROOT=root):
+            html = Template(
+                '{% load static_bundles %}'
+                '{% static_bundle "bundles/site.js" %}'
+            ).render(Context())
+        self.assertIn('<script src="/static/jquery/dist/jquery.min.js">',
+                      html)
+        self.assertNotIn('bundles/site.js', html)
+
+    def test_middleware_negotiates_encoding_and_caching(self):
+        """Сжатая копия — по Accept-Encoding, долгий кэш — по хешу."""
+        name = staticfiles_storage.stored_name('bundles/site.css')
+        response = self.serve(name, 'gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Cache-Control'], IMMUTABLE)
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+        response = self.serve('bundles/site.css')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['Cache-Control'], MUTABLE)
+        for name in ('../settings.py', 'missing.css'):
+            with self.subTest(name=name):
+                self.assertFalse(self.serve(name).has_header('Vary'))
+
+
+class GeneratePostsTest(TestCase):
+    def test_generated_data_is_counted_and_indexed(self):
+        """Сгенерированные записи учтены в счётчиках и поиске."""
+        call_command('generate_posts', users=3, groups=2, posts=50,
+                     batch_size=20, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 50)
+        self.assertEqual(counters.get_count(counters.GLOBAL_SCOPE), 50)
+        author = get_user_model().objects.get(username='bench_user_0')
+        self.assertEqual(
+            counters.get_count(counters.author_scope(author.id)),
+            author.posts.count(),
+        )
+        if search.is_supported():
+            word = Post.objects.first().text.split()[0]
+            self.assertTrue(
+                search.filter_posts(Post.objects.all(), word).exists()
+            )
+
+    def test_same_seed_gives_same_posts(self):
+        """Одинаковый --seed даёт одинаковые записи."""
+        texts = []
+        for _ in range(2):
+            Post.objects.all().delete()
+            call_command('generate_posts', users=2, groups=1, posts=5,
+                         seed=7, stdout=StringIO())
+            texts.append(list(Post.objects.order_by('pub_date')
+                              .values_list('text', 'pub_date')))
+        self.assertEqual(texts[0], texts[1])
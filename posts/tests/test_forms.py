@@ -1,8 +1,16 @@
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
 
-from posts.models import Group, Post
+from posts import caching, jobs, tasks, thumbnails
+from posts.models import Group, Job, Post
 
 
 class NewPost_FormTest(TestCase):
@@ -82,3 +90,97 @@ class PostEdit_FormTest(TestCase):
 
         self.assertEqual(response.context['post'].text,
                          PostEdit_FormTest.form_data['text'])
+
+
+def make_image(name='image.png'):
+    content = BytesIO()
+    Image.new('RGB', (1200, 800), 'red').save(content, 'PNG')
+    return SimpleUploadedFile(name, content.getvalue(),
+                              content_type='image/png')
+
+
+class PostImageTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create(username='testuser')
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        settings = override_settings(MEDIA_ROOT=media)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        caching.get_cache().clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_upload_builds_thumbnail(self):
+        """Загруженное изображение попадает в ленту миниатюрой."""
+        self.authorized_client.post(
+            reverse('new_post'),
+            data={'text': 'Запись с картинкой', 'image': make_image()},
+        )
+        post = Post.objects.get()
+        self.assertTrue(post.image.name.startswith('posts/'))
+        thumbnail = thumbnails.get_cached(post.image, 'feed')
+        self.assertEqual(thumbnail.size, [960, 339])
+        self.assertContains(self.authorized_client.get(reverse('index')),
+                            thumbnail.url)
+
+    @override_settings(POSTS_JOBS_MODE='worker')
+    def test_feed_never_decodes_images(self):
+        """Лента без миниатюры показывает оригинал и ставит задачу."""
+        post = Post.objects.create(text='Запись с картинкой',
+                                   author=self.user, image=make_image())
+        while jobs.run_batch():
+            pass
+        thumbnails.default.kvstore.clear()
+        caching.get_cache().clear()
+
+        get_image = 'sorl.thumbnail.engines.pil_engine.Engine.get_image'
+        with mock.patch(get_image, side_effect=AssertionError):
+            for _ in range(2):
+                response = self.authorized_client.get(reverse('index'))
+                self.assertContains(response, post.image.url)
+        self.assertEqual(
+            Job.objects.filter(name=tasks.GENERATE_THUMBNAILS).count(), 1
+        )
+
+        jobs.run_batch()
+        self.assertIsNotNone(thumbnails.get_cached(post.image, 'feed'))
+
+    def test_eager_feed_never_decodes_images(self):
+        """В режиме eager лента тоже не строит миниатюры при отрисовке."""
+        post = Post.objects.create(text='Запись с картинкой',
+                                   author=self.user, image=make_image())
+        thumbnails.default.kvstore.clear()
+        caching.get_cache().clear()
+
+        get_image = 'sorl.thumbnail.engines.pil_engine.Engine.get_image'
+        with mock.patch(get_image, side_effect=AssertionError):
+            response = self.authorized_client.get(reverse('index'))
+        self.assertContains(response, post.image.url)
+
+    @override_settings(POSTS_JOBS_MODE='worker')
+    def test_text_edit_does_not_rebuild_thumbnails(self):
+        """Миниатюры перестраивает замена картинки, а не правка текста."""
+        post = Post.objects.create(text='Запись с картинкой',
+                                   author=self.user, image=make_image())
+        while jobs.run_batch():
+            pass
+        url = reverse('post_edit', kwargs={'username': 'testuser',
+                                           'post_id': post.id})
+        cases = (
+            ({'text': 'Исправленный текст'}, 0),
+            ({'text': 'Новая картинка', 'image': make_image('new.png')}, 1),
+        )
+        for data, expected in cases:
+            with self.subTest(data=data['text']):
+                self.authorized_client.post(url, data=data)
+                jobs.run_batch()
+                self.assertEqual(Job.objects.filter(
+                    name=tasks.GENERATE_THUMBNAILS
+                ).count(), expected)
+                while jobs.run_batch():
+                    pass
@@ -1,7 +1,19 @@
+from io import StringIO
+from unittest import mock, skipUnless
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Q
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
 
-from posts.models import Group, Post
+from posts import counters, jobs, search, signals
+from posts.models import Follow, Group, Job, Post, TimelineEntry
+from posts.paginators import CursorPaginator
 
 
 class PostModelTest(TestCase):
@@ -108,3 +120,247 @@ class PostModelTest(TestCase):
         max_length = 15
         len_post_str_value = len(self.post.__str__())
         self.assertEqual(max_length, len_post_str_value)
+
+
+class PostCounterTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        User = get_user_model()
+        cls.user = User.objects.create(username='testuser')
+        cls.group_1 = Group.objects.create(title='Тестовая группа 1',
+                                           slug='test-group-1',
+                                           description='Описание')
+        cls.group_2 = Group.objects.create(title='Тестовая группа 2',
+                                           slug='test-group-2',
+                                           description='Описание')
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def assertCounters(self, expected):
+        for scope, count in expected.items():
+            with self.subTest(scope=scope):
+                self.assertEqual(counters.get_count(scope), count)
+
+    def test_counters_follow_form_create_edit_and_delete(self):
+        """Счётчики меняются при создании, правке и удалении записи."""
+        self.authorized_client.post(
+            reverse('new_post'),
+            data={'text': 'Тестовая запись', 'group': self.group_1.id},
+        )
+        post = Post.objects.get()
+        self.assertCounters({
+            counters.GLOBAL_SCOPE: 1,
+            counters.author_scope(self.user.id): 1,
+            counters.group_scope(self.group_1.id): 1,
+        })
+
+        self.authorized_client.post(
+            reverse('post_edit', kwargs={'username': 'testuser',
+                                         'post_id': post.id}),
+            data={'text': 'Тестовая запись', 'group': self.group_2.id},
+        )
+        self.assertCounters({
+            counters.GLOBAL_SCOPE: 1,
+            counters.group_scope(self.group_1.id): 0,
+            counters.group_scope(self.group_2.id): 1,
+        })
+
+        Post.objects.get().delete()
+        self.assertCounters({
+            counters.GLOBAL_SCOPE: 0,
+            counters.author_scope(self.user.id): 0,
+            counters.group_scope(self.group_2.id): 0,
+        })
+
+    def test_delete_post_with_drifted_counter(self):
+        """Удаление записи при нулевом счётчике не уводит его в минус."""
+        Post.objects.bulk_create([
+            Post(text='Тестовая запись', author=self.user, group=self.group_1)
+        ])
+        Post.objects.get().delete()
+        self.assertCounters({
+            counters.GLOBAL_SCOPE: 0,
+            counters.author_scope(self.user.id): 0,
+            counters.group_scope(self.group_1.id): 0,
+        })
+
+    def test_rebuild_counters_command(self):
+        """Команда rebuild_counters пересчитывает счётчики с нуля."""
+        Post.objects.bulk_create([
+            Post(text='Тестовая запись', author=self.user, group=self.group_1)
+            for _ in range(3)
+        ])
+        call_command('rebuild_counters', stdout=StringIO())
+        self.assertCounters({
+            counters.GLOBAL_SCOPE: 3,
+            counters.author_scope(self.user.id): 3,
+            counters.group_scope(self.group_1.id): 3,
+            counters.group_scope(self.group_2.id): 0,
+        })
+
+
+def flaky_job(payloads):
+    if any(payload['fail'] for payload in payloads):
+        raise ValueError('Тестовая ошибка')
+
+
+def counting_job(payloads):
+    counters.change(['test'], len(payloads))
+
+
+@override_settings(POSTS_JOBS_MODE='worker', POSTS_JOBS_MAX_ATTEMPTS=2)
+class JobQueueTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        User = get_user_model()
+        cls.author = User.objects.create(username='testuser')
+        cls.follower = User.objects.create(username='follower',
+                                           email='follower@example.com')
+        Follow.objects.create(user=cls.follower, author=cls.author)
+
+    def setUp(self):
+        for name, fn in (('test_flaky', flaky_job),
+                         ('test_counting', counting_job)):
+            jobs.handler(name)(fn)
+            self.addCleanup(jobs._handlers.pop, name)
+
+    def test_new_post_writes_only_post_and_job(self):
+        """Запрос пишет запись и задачу, остальное делает исполнитель."""
+        client = Client()
+        client.force_login(self.author)
+        with CaptureQueriesContext(connection) as queries:
+            client.post(reverse('new_post'), data={'text': 'Свежая запись'})
+        writes = [query['sql'] for query in queries
+                  if query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))]
+        self.assertEqual(len(writes), 2)
+        self.assertIn('"posts_post"', writes[0])
+        self.assertIn('"posts_job"', writes[1])
+        self.assertEqual(counters.get_count(counters.GLOBAL_SCOPE), 0)
+
+        call_command('run_jobs', '--once', stdout=StringIO())
+        post = Post.objects.get()
+        self.assertEqual(counters.get_count(counters.GLOBAL_SCOPE), 1)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.follower, post=post
+        ).exists())
+        if search.is_supported():
+            self.assertEqual(
+                list(search.filter_posts(Post.objects.all(), 'свежая')),
+                [post],
+            )
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['follower@example.com'])
+        self.assertFalse(Job.objects.exists())
+
+    def test_failed_job_is_retried_alone_then_marked_failed(self):
+        """Упавшая задача не мешает пачке и повторяется до предела."""
+        jobs.enqueue('test_flaky', fail=False)
+        jobs.enqueue('test_flaky', fail=True)
+        with self.assertLogs('posts.jobs', 'WARNING'):
+            self.assertEqual(jobs.run_batch(), 2)
+        job = Job.objects.get()
+        self.assertEqual(job.attempts, 1)
+        self.assertFalse(job.failed)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('Тестовая ошибка', job.last_error)
+        self.assertEqual(jobs.run_batch(), 0)
+
+        Job.objects.update(run_at=timezone.now())
+        with self.assertLogs('posts.jobs', 'WARNING'):
+            jobs.run_batch()
+        job.refresh_from_db()
+        self.assertEqual(job.attempts, 2)
+        self.assertTrue(job.failed)
+        Job.objects.update(run_at=timezone.now())
+        self.assertEqual(jobs.run_batch(), 0)
+
+    def test_crash_before_job_delete_rolls_back_handler(self):
+        """Сбой до удаления строки откатывает и изменения обработчика."""
+        jobs.enqueue('test_counting')
+        with mock.patch('django.db.models.QuerySet.delete',
+                        side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                jobs.run_batch()
+        self.assertEqual(counters.get_count('test'), 0)
+
+        # Срок аренды упавшего исполнителя истёк.
+        Job.objects.update(run_at=timezone.now())
+        self.assertEqual(jobs.run_batch(), 1)
+        self.assertEqual(counters.get_count('test'), 1)
+        self.assertFalse(Job.objects.exists())
+
+    def test_job_taken_by_another_worker_is_rolled_back(self):
+        """Задачу, которую после истечения аренды забрал другой, не считаем."""
+        jobs.enqueue('test_counting')
+        claim = jobs._claim
+
+        def claim_and_lose(batch_size):
+            claimed = claim(batch_size)
+            Job.objects.update(locked_by='другой исполнитель')
+            return claimed
+
+        with mock.patch('posts.jobs._claim', claim_and_lose):
+            self.assertEqual(jobs.run_batch(), 1)
+        self.assertEqual(counters.get_count('test'), 0)
+        self.assertEqual(Job.objects.get().locked_by, 'другой исполнитель')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN из SQLite')
+class PostIndexesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create(username='testuser')
+        cls.group = Group.objects.create(title='Тестовая группа',
+                                         slug='test-group',
+                                         description='Описание')
+        cls.post = Post.objects.create(text='Тестовая запись',
+                                       author=cls.user,
+                                       group=cls.group)
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(f'USING INDEX {index_name}', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_feed_queries_use_composite_indexes(self):
+        """Ленты читаются по составным индексам без сортировки в памяти."""
+        feeds = {
+            'post_pub_date_idx': Post.objects.feed(),
+            'post_group_pub_date_idx': self.group.posts.feed(),
+            'post_author_pub_date_idx': self.user.posts.feed(),
+        }
+        seek = (Q(pub_date__lt=self.post.pub_date)
+                | Q(pub_date=self.post.pub_date, pk__lt=self.post.pk))
+        for index_name, queryset in feeds.items():
+            with self.subTest(index_name=index_name, mode='page'):
+                self.assertUsesIndex(queryset[:10], index_name)
+            with self.subTest(index_name=index_name, mode='cursor'):
+                self.assertUsesIndex(
+                    queryset.order_by(*CursorPaginator.ordering).filter(
+                        seek
+                    )[:11],
+                    index_name,
+                )
+
+
+@skipUnless(connection.vendor == 'sqlite', 'PRAGMA из SQLite')
+class SqlitePragmasTest(TestCase):
+    def cache_size(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA cache_size')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied_on_connection(self):
+        """PRAGMA из SQLITE_PRAGMAS выполняются при открытии соединения."""
+        default = self.cache_size()
+        with override_settings(SQLITE_PRAGMAS={'cache_size': -4321}):
+            signals.tune_sqlite(sender=type(connection),
+                                connection=connection)
+        self.assertEqual(self.cache_size(), -4321)
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA cache_size = {default}')
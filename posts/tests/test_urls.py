@@ -1,8 +1,15 @@
+import asyncio
+
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.db import router
+from django.http import HttpResponse
+from django.test import (Client, RequestFactory, SimpleTestCase, TestCase,
+                         override_settings)
 from django.urls import reverse
 
 from posts.models import Group, Post
+from yatube.asgi import WsgiToAsgi, application
+from yatube.routers import STICKY_COOKIE, ReplicaStickinessMiddleware
 
 
 class PostURLTests(TestCase):
@@ -96,3 +103,84 @@ class PostURLTests(TestCase):
             with self.subTest():
                 response = self.authorized_client_1.get(reverse_name)
                 self.assertTemplateUsed(response, template)
+
+
+class AsgiApplicationTest(SimpleTestCase):
+    def request(self, path):
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': path,
+            'query_string': b'',
+            'headers': [(b'host', b'testserver')],
+        }
+        asyncio.run(application(scope, receive, send))
+        return messages
+
+    def test_asgi_application_serves_pages(self):
+        """ASGI-приложение отдаёт страницы, отрисованные Django."""
+        messages = self.request('/about/author/')
+        self.assertEqual(messages[0]['type'], 'http.response.start')
+        self.assertEqual(messages[0]['status'], 200)
+        body = b''.join(message.get('body', b'') for message in messages)
+        self.assertIn('Об авторе'.encode(), body)
+        self.assertFalse(messages[-1].get('more_body', False))
+
+    @override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=10)
+    def test_large_body_is_spooled_to_disk(self):
+        """Большое тело запроса уходит во временный файл, а не в память."""
+        messages = [
+            {'type': 'http.request', 'body': b'x' * 8, 'more_body': True},
+            {'type': 'http.request', 'body': b'y' * 8},
+        ]
+
+        async def receive():
+            return messages.pop(0)
+
+        body = asyncio.run(WsgiToAsgi.read_body(receive))
+        self.addCleanup(body.close)
+        self.assertTrue(body._rolled)
+        self.assertEqual(body.read(), b'x' * 8 + b'y' * 8)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTest(SimpleTestCase):
+    def read_alias(self, request):
+        aliases = []
+
+        def view(request):
+            aliases.append(router.db_for_read(Post))
+            return HttpResponse()
+
+        response = ReplicaStickinessMiddleware(view)(request)
+        return aliases[0], response
+
+    def test_reads_go_to_replica(self):
+        """GET без cookie читает с реплики, запись всегда в default."""
+        alias, response = self.read_alias(RequestFactory().get('/'))
+        self.assertEqual(alias, 'replica')
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+        self.assertEqual(router.db_for_write(Post), 'default')
+
+    def test_post_pins_client_to_primary(self):
+        """После POST клиент читает из default, пока жива cookie."""
+        alias, response = self.read_alias(RequestFactory().post('/new/'))
+        self.assertEqual(alias, 'default')
+        self.assertIn(STICKY_COOKIE, response.cookies)
+
+        request = RequestFactory().get('/')
+        request.COOKIES[STICKY_COOKIE] = '1'
+        alias, _ = self.read_alias(request)
+        self.assertEqual(alias, 'default')
+
+    def test_outside_requests_use_primary(self):
+        """Команды и shell работают с основной базой."""
+        self.assertEqual(router.db_for_read(Post), 'default')
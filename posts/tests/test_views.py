@@ -1,9 +1,18 @@
+from io import StringIO
+
 from django import forms
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.management import call_command
+from django.db import connection, router
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
-from posts.models import Group, Post
+from posts import caching, counters, metrics, resolvers, search
+from posts.models import Follow, Group, Post, PostCounter, TimelineEntry
+from yatube.routers import ReplicaStickinessMiddleware
 
 
 class PostPagesTests(TestCase):
@@ -31,6 +40,9 @@ class PostPagesTests(TestCase):
         ])
 
     def setUp(self):
+        # bulk_create не отправляет сигналы, поэтому закэшированные
+        # фрагменты лент от предыдущих тестов нужно сбросить вручную.
+        caching.get_cache().clear()
         self.guest_client = Client()
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user_author)
@@ -153,6 +165,7 @@ class PaginatorViewsTest(TestCase):
         ])
 
     def setUp(self):
+        self.guest_client = Client()
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user_author)
 
@@ -165,3 +178,673 @@ class PaginatorViewsTest(TestCase):
         """Проверяем, что на второй странице только 3 поста."""
         response = self.authorized_client.get(reverse('index') + '?page=2')
         self.assertEqual(len(response.context.get('page').object_list), 3)
+
+    def test_cursor_first_page_contains_ten_records(self):
+        """Проверяем, что первая страница курсора содержит 10 постов."""
+        response = self.authorized_client.get(reverse('index') + '?cursor=')
+        page = response.context.get('page')
+        self.assertEqual(len(page.object_list), 10)
+        self.assertTrue(page.has_next())
+        self.assertFalse(page.has_previous())
+
+    def test_cursor_pages_follow_each_other(self):
+        """Проверяем переходы вперёд и назад по курсору."""
+        first_page = self.authorized_client.get(
+            reverse('index') + '?cursor='
+        ).context.get('page')
+        second_page = self.authorized_client.get(
+            reverse('index') + f'?cursor={first_page.next_cursor}'
+        ).context.get('page')
+        self.assertEqual(len(second_page.object_list), 3)
+        self.assertFalse(second_page.has_next())
+        self.assertTrue(set(first_page).isdisjoint(second_page))
+
+        previous_page = self.authorized_client.get(
+            reverse('index') + f'?cursor={second_page.previous_cursor}'
+        ).context.get('page')
+        self.assertEqual(list(previous_page), list(first_page))
+
+    def test_cursor_page_does_not_count_posts(self):
+        """Проверяем, что в режиме курсора не выполняется COUNT(*)."""
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(reverse('index') + '?cursor=')
+        self.assertFalse(
+            any('COUNT(' in query['sql'] for query in queries.captured_queries)
+        )
+
+
+class FeedQueriesTest(TestCase):
+    # Потолок запросов на отрисовку одной страницы ленты, не зависящий
+    # от количества записей на странице. Группа и профиль делают ещё
+    # один запрос по ключу для проверки ETag.
+    MAX_QUERIES = {
+        'index': 3,
+        'group': 5,
+        'profile': 6,
+    }
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        User = get_user_model()
+        cls.group = Group.objects.create(title='Тестовая группа',
+                                         slug='test-group',
+                                         description='Описание')
+        cls.authors = [
+            User.objects.create(username=f'testuser{number}')
+            for number in range(5)
+        ]
+        Post.objects.bulk_create([
+            Post(
+                text=f'Тестовая запись {number}',
+                author=cls.authors[number % len(cls.authors)],
+                group=cls.group,
+            ) for number in range(15)
+        ])
+
+    def setUp(self):
+        caching.get_cache().clear()
+        self.guest_client = Client()
+
+    def test_feed_pages_query_count_is_capped(self):
+        """Количество запросов на страницу ленты не зависит от числа постов."""
+        urls = {
+            'index': reverse('index'),
+            'group': reverse('group', kwargs={'slug': 'test-group'}),
+            'profile': reverse('profile', kwargs={'username': 'testuser0'}),
+        }
+        for name, url in urls.items():
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertLessEqual(len(queries), self.MAX_QUERIES[name])
+
+
+class FeedCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create(username='testuser')
+        cls.group = Group.objects.create(title='Тестовая группа',
+                                         slug='test-group',
+                                         description='Описание')
+        Post.objects.create(text='Тестовая запись',
+                            author=cls.user,
+                            group=cls.group)
+
+    def setUp(self):
+        caching.get_cache().clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_cached_feed_page_skips_post_query(self):
+        """Повторная отрисовка ленты берёт записи из кэша фрагментов."""
+        with CaptureQueriesContext(connection) as first:
+            self.guest_client.get(reverse('index'))
+        with CaptureQueriesContext(connection) as second:
+            response = self.guest_client.get(reverse('index'))
+        self.assertEqual(len(second), len(first) - 1)
+        self.assertContains(response, 'Тестовая запись')
+
+    def test_new_post_invalidates_cached_feeds(self):
+        """Новая запись сразу видна в общей ленте, группе и профиле."""
+        urls = (
+            reverse('index'),
+            reverse('group', kwargs={'slug': 'test-group'}),
+            reverse('profile', kwargs={'username': 'testuser'}),
+        )
+        for url in urls:
+            self.guest_client.get(url)
+        self.authorized_client.post(
+            reverse('new_post'),
+            data={'text': 'Свежая запись', 'group': self.group.id},
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.guest_client.get(url),
+                                    'Свежая запись')
+
+    def test_group_edit_bumps_only_group_scope(self):
+        """Правка группы сбрасывает только кэш этой группы."""
+        scopes = (
+            counters.GLOBAL_SCOPE,
+            counters.author_scope(self.user.id),
+            counters.group_scope(self.group.id),
+        )
+        before = {scope: caching.get_version(scope) for scope in scopes}
+        self.group.description = 'Новое описание'
+        self.group.save()
+        after = {scope: caching.get_version(scope) for scope in scopes}
+
+        self.assertEqual(before[counters.GLOBAL_SCOPE],
+                         after[counters.GLOBAL_SCOPE])
+        self.assertEqual(before[counters.author_scope(self.user.id)],
+                         after[counters.author_scope(self.user.id)])
+        self.assertGreater(after[counters.group_scope(self.group.id)],
+                           before[counters.group_scope(self.group.id)])
+
+
+class GroupDirectoryTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create(username='testuser')
+        cls.group = Group.objects.create(title='Тестовая группа',
+                                         slug='test-group',
+                                         description='Описание')
+        Group.objects.create(title='Пустая группа', slug='empty-group')
+        cls.posts = [
+            Post.objects.create(text=f'Запись {number}', author=cls.user,
+                                group=cls.group)
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        caching.get_cache().clear()
+        self.client = Client()
+
+    def counter(self):
+        return PostCounter.objects.get(
+            scope=counters.group_scope(self.group.pk)
+        )
+
+    def test_directory_shows_precomputed_stats(self):
+        """Каталог показывает число записей, дату и ссылку на группу."""
+        response = self.client.get(reverse('group_list'))
+        self.assertContains(response, reverse('group', args=['test-group']))
+        self.assertContains(response, 'Записей: 3')
+        self.assertContains(response, 'Записей: 0')
+        self.assertEqual(self.counter().last_post_date,
+                         self.posts[-1].pub_date)
+
+    def test_last_post_date_follows_delete(self):
+        """После удаления последней записи дата берётся у предыдущей."""
+        self.posts[-1].delete()
+        counter = self.counter()
+        self.assertEqual(counter.count, 2)
+        self.assertEqual(counter.last_post_date, self.posts[-2].pub_date)
+
+    def test_cached_directory_is_reset_by_group_edit(self):
+        """Каталог берётся из кэша, пока группу не отредактируют."""
+        self.client.get(reverse('group_list'))
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('group_list'))
+        sql = ' '.join(query['sql'] for query in queries)
+        self.assertNotIn('"posts_postcounter"', sql)
+        self.assertNotIn('"posts_group"."title"', sql)
+
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.assertContains(self.client.get(reverse('group_list')),
+                            'Новое название')
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create(username='testuser')
+        cls.group = Group.objects.create(title='Тестовая группа',
+                                         slug='test-group',
+                                         description='Описание')
+        cls.post = Post.objects.create(text='Тестовая запись',
+                                       author=cls.user,
+                                       group=cls.group)
+
+    def setUp(self):
+        caching.get_cache().clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_unchanged_pages_return_304_without_queries(self):
+        """Неизменившиеся страницы отдают 304 без запросов к ленте."""
+        urls = {
+            reverse('index'): 0,
+            reverse('group', kwargs={'slug': 'test-group'}): 0,
+            reverse('profile', kwargs={'username': 'testuser'}): 0,
+            reverse('post', kwargs={'username': 'testuser',
+                                    'post_id': self.post.id}): 1,
+        }
+        for url, queries in urls.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.has_header('Last-Modified'))
+                with self.assertNumQueries(queries):
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=response['ETag']
+                    )
+                self.assertEqual(response.status_code, 304)
+
+    def test_etag_depends_on_viewer(self):
+        """Гость и авторизованный пользователь получают разные ETag."""
+        url = reverse('index')
+        etag = self.guest_client.get(url)['ETag']
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Cookie', response['Vary'])
+
+    def test_post_edit_changes_validators(self):
+        """Правка записи обновляет updated_at и ETag страницы записи."""
+        url = reverse('post', kwargs={'username': 'testuser',
+                                      'post_id': self.post.id})
+        etag = self.guest_client.get(url)['ETag']
+        updated_at = Post.objects.get(id=self.post.id).updated_at
+        self.authorized_client.post(
+            reverse('post_edit', kwargs={'username': 'testuser',
+                                         'post_id': self.post.id}),
+            data={'text': 'Исправленная запись', 'group': self.group.id},
+        )
+        self.assertGreater(Post.objects.get(id=self.post.id).updated_at,
+                           updated_at)
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Исправленная запись')
+
+    def test_missing_profile_is_not_found(self):
+        """Для несуществующего автора валидаторов нет, ответ — 404."""
+        response = self.guest_client.get(
+            reverse('profile', kwargs={'username': 'nobody'}),
+            HTTP_IF_NONE_MATCH='"any"',
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class ResolverTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create(username='testuser')
+        cls.group = Group.objects.create(title='Тестовая группа',
+                                         slug='test-group')
+        cls.post = Post.objects.create(text='Тестовая запись',
+                                       author=cls.user,
+                                       group=cls.group)
+
+    def setUp(self):
+        caching.get_cache().clear()
+        self.client = Client()
+        # Откат транзакции теста не вызывает сигналов, поэтому
+        # переименования сбрасываются вручную.
+        self.addCleanup(resolvers.user_ids.invalidate, 'testuser', 'renamed')
+        self.addCleanup(resolvers.groups.invalidate, 'test-group', 'renamed')
+
+    def test_post_page_does_not_join_author(self):
+        """Повторный запрос записи не ищет автора по username."""
+        url = reverse('post', kwargs={'username': 'testuser',
+                                      'post_id': self.post.id})
+        self.client.get(url)
+        caching.get_cache().clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        for query in queries:
+            self.assertNotIn('"auth_user"."username" =', query['sql'])
+
+    @override_settings(DATABASE_REPLICAS=['replica'])
+    def test_values_are_loaded_from_primary(self):
+        """Промах читается из основной базы, а не с отстающей реплики."""
+        aliases = []
+
+        def view(request):
+            aliases.append(router.db_for_read(Post))
+            resolvers.user_ids.invalidate('testuser')
+            return HttpResponse(resolvers.user_id('testuser'))
+
+        response = ReplicaStickinessMiddleware(view)(RequestFactory().get('/'))
+        self.assertEqual(aliases, ['replica'])
+        self.assertEqual(response.content, str(self.user.pk).encode())
+
+    def test_renamed_user_and_group(self):
+        """После переименования старый адрес — 404, новый — 200."""
+        cases = (
+            (get_user_model(), 'username', 'testuser', 'profile'),
+            (Group, 'slug', 'test-group', 'group'),
+        )
+        for model, field, old, view in cases:
+            with self.subTest(field=field):
+                old_url = reverse(view, args=[old])
+                new_url = reverse(view, args=['renamed'])
+                self.assertEqual(self.client.get(old_url).status_code, 200)
+                self.assertEqual(self.client.get(new_url).status_code, 404)
+                instance = model.objects.get(**{field: old})
+                setattr(instance, field, 'renamed')
+                instance.save()
+                self.assertEqual(self.client.get(old_url).status_code, 404)
+                self.assertEqual(self.client.get(new_url).status_code, 200)
+
+
+@override_settings(POSTS_ESTIMATED_COUNT_THRESHOLD=100)
+class StreamingFeedTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create(username='testuser')
+        Post.objects.bulk_create([
+            Post(text=f'Запись номер {number}', author=cls.user)
+            for number in range(60)
+        ])
+
+    def setUp(self):
+        caching.get_cache().clear()
+        self.client = Client()
+
+    def test_large_page_is_streamed(self):
+        """Большая страница отдаётся потоком: сначала шапка, потом записи."""
+        urls = {
+            reverse('index'): 'Читать далее',
+            reverse('profile', kwargs={'username': 'testuser'}):
+                'Добавить комментарий',
+        }
+        for url, item in urls.items():
+            with self.subTest(url=url):
+                response = self.client.get(url, {'per_page': 50})
+                self.assertTrue(response.streaming)
+                chunks = [chunk.decode()
+                          for chunk in response.streaming_content]
+                self.assertIn('<nav', chunks[0])
+                self.assertNotIn('Запись номер', chunks[0])
+                self.assertEqual(len(chunks), 50 + 2)
+                html = ''.join(chunks)
+                self.assertEqual(html.count(item), 50)
+                self.assertIn('per_page=50', html)
+
+    def test_small_or_unknown_page_size_is_rendered(self):
+        """Обычные страницы и неизвестный per_page рендерятся как раньше."""
+        for per_page in (20, 33, 'много'):
+            with self.subTest(per_page=per_page):
+                response = self.client.get(reverse('index'),
+                                           {'per_page': per_page})
+                self.assertFalse(response.streaming)
+                expected = 20 if per_page == 20 else 10
+                self.assertEqual(len(response.context['page']), expected)
+
+
+class EstimatedCountTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create(username='testuser')
+        cls.group = Group.objects.create(title='Тестовая группа',
+                                         slug='test-group',
+                                         description='Описание')
+        Post.objects.bulk_create([
+            Post(text='Тестовая запись', author=cls.user, group=cls.group)
+            for _ in range(13)
+        ])
+        # Оценка для общей ленты намеренно больше реального числа записей.
+        PostCounter.objects.update_or_create(
+            scope=counters.GLOBAL_SCOPE, defaults={'count': 500000}
+        )
+        PostCounter.objects.update_or_create(
+            scope=counters.group_scope(cls.group.id), defaults={'count': 13}
+        )
+
+    def setUp(self):
+        caching.get_cache().clear()
+        self.guest_client = Client()
+
+    def test_large_feed_uses_counter_instead_of_count_query(self):
+        """Большая лента берёт число записей из счётчика без COUNT(*)."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(reverse('index'))
+        self.assertEqual(response.context['paginator'].count, 500000)
+        self.assertFalse(
+            any('COUNT(' in query['sql'] for query in queries.captured_queries)
+        )
+
+    def test_small_feed_uses_exact_count(self):
+        """Небольшая лента группы считается точно."""
+        response = self.guest_client.get(
+            reverse('group', kwargs={'slug': 'test-group'})
+        )
+        self.assertEqual(response.context['paginator'].count, 13)
+
+    def test_paginator_renders_truncated_page_range(self):
+        """Навигация выводит окно страниц, а не весь page_range."""
+        response = self.guest_client.get(reverse('index') + '?page=3')
+        self.assertContains(response, '?page=50000')
+        self.assertContains(response, '&hellip;')
+        self.assertNotContains(response, '?page=100"')
+
+    def test_admin_changelist_is_counted_and_joined(self):
+        """Список записей в админке: счётчик вместо COUNT(*), автор в JOIN."""
+        admin = get_user_model().objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        self.guest_client.force_login(admin)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(
+                reverse('admin:posts_post_changelist')
+            )
+        changelist = response.context['cl']
+        self.assertEqual(changelist.result_count, 500000)
+        self.assertIsNone(changelist.full_result_count)
+        sql = [query['sql'] for query in queries.captured_queries]
+        self.assertFalse(any('COUNT(' in query for query in sql))
+        # Месяцы без SELECT DISTINCT по всей таблице.
+        self.assertFalse(any('DISTINCT' in query for query in sql))
+        self.assertEqual(
+            len([query for query in sql if 'FROM "auth_user"' in query]), 1
+        )
+
+        month = timezone.localtime().strftime('%Y-%m')
+        self.assertContains(response, f'?month={month}')
+        for value, expected in ((month, 13), ('2000-01', 0)):
+            with self.subTest(month=value):
+                response = self.guest_client.get(
+                    reverse('admin:posts_post_changelist'), {'month': value}
+                )
+                self.assertEqual(response.context['cl'].result_count,
+                                 expected)
+
+    def test_admin_search_counts_matches(self):
+        """Поиск в админке считает найденные записи, а не всю таблицу."""
+        admin = get_user_model().objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        self.guest_client.force_login(admin)
+        search.rebuild()
+        for query, expected in (('тестовая', 13), ('!!!', 0)):
+            with self.subTest(query=query):
+                response = self.guest_client.get(
+                    reverse('admin:posts_post_changelist'), {'q': query}
+                )
+                self.assertEqual(response.context['cl'].result_count,
+                                 expected)
+
+
+class SearchViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create(username='testuser')
+        cls.best = Post.objects.create(
+            text='Ёжик в тумане, ёжик у реки, ёжик дома', author=cls.user
+        )
+        cls.other = Post.objects.create(
+            text='Про ёжика и лошадь: ежик гуляет', author=cls.user
+        )
+        Post.objects.create(text='Запись без совпадений', author=cls.user)
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_search_returns_ranked_matches(self):
+        """Поиск находит записи по индексу и ранжирует их по bm25."""
+        response = self.guest_client.get(reverse('search'), {'q': 'ежик'})
+        self.assertEqual(list(response.context['page']),
+                         [self.best, self.other])
+
+    def test_search_index_follows_edits_and_deletes(self):
+        """Индекс обновляется при правке и удалении записи."""
+        other = Post.objects.get(pk=self.other.pk)
+        other.text = 'Про лошадь'
+        other.save()
+        response = self.guest_client.get(reverse('search'), {'q': 'ежик'})
+        self.assertEqual(list(response.context['page']), [self.best])
+
+        Post.objects.get(pk=self.best.pk).delete()
+        response = self.guest_client.get(reverse('search'), {'q': 'ежик'})
+        self.assertEqual(list(response.context['page']), [])
+
+    def test_search_paginator_keeps_query(self):
+        """Ссылки паджинатора сохраняют поисковый запрос."""
+        Post.objects.bulk_create([
+            Post(text='Ёжик', author=self.user) for _ in range(10)
+        ])
+        call_command('rebuild_search_index', stdout=StringIO())
+        response = self.guest_client.get(reverse('search'), {'q': 'ёжик'})
+        self.assertEqual(response.context['paginator'].count, 12)
+        self.assertContains(response, '?q=%D1%91%D0%B6%D0%B8%D0%BA&amp;page=2')
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке идёт через тот же индекс."""
+        admin = get_user_model().objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        self.guest_client.force_login(admin)
+        response = self.guest_client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'ежик'}
+        )
+        self.assertEqual(set(response.context['cl'].result_list),
+                         {self.best, self.other})
+
+
+class MetricsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        User = get_user_model()
+        cls.user = User.objects.create(username='testuser')
+        cls.staff = User.objects.create(username='staff', is_staff=True)
+        Post.objects.create(text='Тестовая запись', author=cls.user)
+
+    def setUp(self):
+        caching.get_cache().clear()
+        metrics.registry.clear()
+        self.guest_client = Client()
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+
+    def test_metrics_are_staff_only(self):
+        """Метрики доступны только персоналу."""
+        response = self.guest_client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_request_is_recorded_by_url_name(self):
+        """Запрос к ленте попадает в метрики под своим именем URL."""
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(reverse('index'))
+        series = metrics.registry.series
+        self.assertEqual(series['sql_queries', 'index'].total, len(queries))
+        self.assertGreater(
+            series['template_duration_seconds', 'index'].total, 0
+        )
+
+        response = self.staff_client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'],
+                         'text/plain; version=0.0.4')
+        content = response.content.decode()
+        self.assertIn('# TYPE yatube_request_duration_seconds summary',
+                      content)
+        self.assertIn('yatube_sql_queries_count{view="index"} 1', content)
+        self.assertIn(
+            'yatube_request_duration_seconds{view="index",quantile="0.99"}',
+            content,
+        )
+
+
+class FollowTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        User = get_user_model()
+        cls.author = User.objects.create(username='author')
+        cls.follower = User.objects.create(username='follower')
+        cls.stranger = User.objects.create(username='stranger')
+        cls.old_post = Post.objects.create(text='Старая запись',
+                                           author=cls.author)
+
+    def setUp(self):
+        caching.get_cache().clear()
+        self.follower_client = Client()
+        self.follower_client.force_login(self.follower)
+        self.stranger_client = Client()
+        self.stranger_client.force_login(self.stranger)
+
+    def follow(self, client=None, username='author'):
+        return (client or self.follower_client).post(
+            reverse('profile_follow', kwargs={'username': username})
+        )
+
+    def test_follow_and_unfollow(self):
+        """Подписка и отписка меняют счётчики и ленту подписок."""
+        self.follow()
+        self.assertTrue(Follow.objects.filter(user=self.follower,
+                                              author=self.author).exists())
+        response = self.follower_client.get(
+            reverse('profile', kwargs={'username': 'author'})
+        )
+        self.assertEqual(response.context['followers_count'], 1)
+        self.assertTrue(response.context['following'])
+        self.assertContains(self.follower_client.get(reverse('follow_index')),
+                            'Старая запись')
+
+        self.follower_client.post(
+            reverse('profile_unfollow', kwargs={'username': 'author'})
+        )
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(
+            counters.get_count(counters.followers_scope(self.author.id)), 0
+        )
+
+    def test_new_post_reaches_only_followers(self):
+        """Новая запись попадает в ленту подписчика, но не чужую."""
+        self.follow()
+        Post.objects.create(text='Свежая запись', author=self.author)
+        self.assertContains(self.follower_client.get(reverse('follow_index')),
+                            'Свежая запись')
+        self.assertNotContains(
+            self.stranger_client.get(reverse('follow_index')), 'Свежая запись'
+        )
+
+    def test_cannot_follow_self_or_by_get(self):
+        """Нельзя подписаться на себя и подписаться GET-запросом."""
+        author_client = Client()
+        author_client.force_login(self.author)
+        self.follow(author_client)
+        self.assertFalse(Follow.objects.exists())
+        response = self.follower_client.get(
+            reverse('profile_follow', kwargs={'username': 'author'})
+        )
+        self.assertEqual(response.status_code, 405)
+
+    def test_feed_page_is_one_indexed_read(self):
+        """Страница ленты подписок читается одним запросом по индексу."""
+        self.follow()
+        with CaptureQueriesContext(connection) as queries:
+            self.follower_client.get(reverse('follow_index'))
+        feed_queries = [query['sql'] for query in queries
+                        if 'posts_timelineentry' in query['sql']
+                        and 'LIMIT' in query['sql']]
+        self.assertEqual(len(feed_queries), 1)
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + feed_queries[0])
+                plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+            self.assertIn('timeline_user_pub_date_idx', plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+
+    @override_settings(FOLLOW_FANOUT_LIMIT=0)
+    def test_popular_author_is_pulled_on_read(self):
+        """Записи популярного автора подмешиваются в ленту при чтении."""
+        self.follow()
+        caching.get_cache().clear()
+        Post.objects.create(text='Запись звезды', author=self.author)
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertContains(self.follower_client.get(reverse('follow_index')),
+                            'Запись звезды')
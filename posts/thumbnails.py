@@ -0,0 +1,41 @@
+"""
+Миниатюры изображений записей (sorl-thumbnail).
+
+Размеры перечислены в settings.POSTS_THUMBNAILS. Миниатюры строит задача
+posts.jobs после публикации или при первом показе записи без них;
+шаблоны лент только ищут готовую миниатюру в KV-хранилище sorl и никогда
+не декодируют изображение сами.
+"""
+from django.conf import settings
+from sorl.thumbnail import base, default
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+
+class ThumbnailBackend(base.ThumbnailBackend):
+    def get_cached_thumbnail(self, file_, geometry_string, **options):
+        """Миниатюра из KV-хранилища или None, без чтения изображения."""
+        source = ImageFile(file_)
+        # Те же умолчания, что в get_thumbnail: от них зависит имя файла.
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault("format", self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return default.kvstore.get(ImageFile(name, default.storage))
+
+
+def get_cached(image, size):
+    geometry, options = settings.POSTS_THUMBNAILS[size]
+    return default.backend.get_cached_thumbnail(image, geometry, **options)
+
+
+def generate(image):
+    """Строит недостающие миниатюры всех размеров."""
+    for geometry, options in settings.POSTS_THUMBNAILS.values():
+        default.backend.get_thumbnail(image, geometry, **options)
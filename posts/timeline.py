@@ -0,0 +1,100 @@
+"""
+Лента подписок: разложение записей по лентам подписчиков при публикации.
+
+Новая запись копируется в TimelineEntry каждого подписчика автора, и
+страница ленты — это один проход по индексу (user, -pub_date, -post).
+Записи авторов, у которых подписчиков больше FOLLOW_FANOUT_LIMIT, не
+раскладываются: такие авторы подмешиваются в ленту при чтении.
+"""
+from django.conf import settings
+from django.db.models import F, Q
+
+from . import caching, counters
+from .models import Follow, Post, PostCounter, TimelineEntry
+
+BATCH_SIZE = 1000
+# Список популярных авторов меняется редко и читается на каждой странице
+# ленты, поэтому он кэшируется ненадолго.
+POPULAR_AUTHORS_KEY = "posts:popular_authors"
+POPULAR_AUTHORS_TIMEOUT = 60
+
+
+def is_fanned_out(author_id):
+    followers = counters.get_count(counters.followers_scope(author_id))
+    return followers <= settings.FOLLOW_FANOUT_LIMIT
+
+
+def fan_out(post):
+    """Раскладывает новую запись по лентам подписчиков автора."""
+    if not is_fanned_out(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list("user_id", flat=True).iterator()
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user_id=user_id, post_id=post.pk,
+                       pub_date=post.pub_date)
+         for user_id in followers),
+        batch_size=BATCH_SIZE, ignore_conflicts=True,
+    )
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту нового подписчика последние записи автора."""
+    if not is_fanned_out(author_id):
+        return
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        "-pub_date", "-pk"
+    ).values_list("pk", "pub_date")[:settings.FOLLOW_BACKFILL]
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+         for pk, pub_date in posts],
+        batch_size=BATCH_SIZE, ignore_conflicts=True,
+    )
+
+
+def remove(user_id, author_id):
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+def popular_authors():
+    cache = caching.get_cache()
+    author_ids = cache.get(POPULAR_AUTHORS_KEY)
+    if author_ids is None:
+        scopes = PostCounter.objects.filter(
+            scope__startswith=counters.followers_scope(""),
+            count__gt=settings.FOLLOW_FANOUT_LIMIT,
+        ).values_list("scope", flat=True)
+        author_ids = [int(scope.split(":")[1]) for scope in scopes]
+        cache.set(POPULAR_AUTHORS_KEY, author_ids, POPULAR_AUTHORS_TIMEOUT)
+    return author_ids
+
+
+def pulled_authors(user):
+    """Авторы из подписок пользователя, чьи записи не раскладываются."""
+    author_ids = popular_authors()
+    if not author_ids:
+        return []
+    return list(Follow.objects.filter(
+        user=user, author_id__in=author_ids
+    ).values_list("author_id", flat=True))
+
+
+def feed(user):
+    """Записи ленты подписок пользователя, новые сверху."""
+    authors = pulled_authors(user)
+    if not authors:
+        # Сортировка по столбцам самой ленты совпадает с порядком индекса,
+        # так что SQLite не сортирует строки, а читает их подряд.
+        return Post.objects.feed().filter(
+            timeline_entries__user=user
+        ).order_by(
+            "-timeline_entries__pub_date",
+            F("timeline_entries__post").desc(),
+        )
+    own = TimelineEntry.objects.filter(user=user).values("post_id")
+    return Post.objects.feed().filter(
+        Q(pk__in=own) | Q(author_id__in=authors)
+    )
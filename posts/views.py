@@ -1,52 +1,156 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render
+from django.views.decorators.http import require_POST
 
+from . import caching, counters, resolvers, search, streaming, timeline
+from .conditional import conditional_page
 from .forms import PostForm
-from .models import Group, Post, User
+from .models import Follow, Group, Post, User
+from .paginators import paginate
 
 
+def _index_state(request):
+    return [counters.GLOBAL_SCOPE], None
+
+
+def _group_or_404(slug):
+    group = resolvers.group(slug)
+    if group is None:
+        raise Http404("No Group matches the given query.")
+    return group
+
+
+def _author_id_or_404(username):
+    author_id = resolvers.user_id(username)
+    if author_id is None:
+        raise Http404("No User matches the given query.")
+    return author_id
+
+
+def _group_state(request, slug):
+    group = resolvers.group(slug)
+    if group is None:
+        return None
+    return [counters.group_scope(group.pk)], None
+
+
+def _profile_state(request, username):
+    author_id = resolvers.user_id(username)
+    if author_id is None:
+        return None
+    return [counters.author_scope(author_id)], None
+
+
+def _post_state(request, username, post_id):
+    author_id = resolvers.user_id(username)
+    if author_id is None:
+        return None
+    row = Post.objects.filter(id=post_id, author_id=author_id).values_list(
+        "group_id", "updated_at"
+    ).first()
+    if row is None:
+        return None
+    group_id, updated_at = row
+    scopes = [counters.author_scope(author_id)]
+    if group_id is not None:
+        scopes.append(counters.group_scope(group_id))
+    return scopes, updated_at
+
+
+@conditional_page(_index_state)
 def index(request):
-    post_list = Post.objects.select_related("group")
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
+    post_list = Post.objects.feed().count_from(counters.GLOBAL_SCOPE)
+    page_size = streaming.per_page(request, 10)
+    paginator, page = paginate(request, post_list, page_size)
+    context = {
+        "page": page,
+        "post_list": post_list,
+        "paginator": paginator,
+        "feed_cache": caching.FeedFragment(request, counters.GLOBAL_SCOPE),
+    }
+    if streaming.is_streamed(page_size):
+        return streaming.stream_page(request, "index.html", context,
+                                     "index_post.html")
+    return render(request, "index.html", context)
+
+
+@conditional_page(_group_state)
+def group_posts(request, slug):
+    group = _group_or_404(slug)
+    posts = group.posts.feed().count_from(counters.group_scope(group.pk))
+    paginator, page = paginate(request, posts, 12)
     return render(
         request,
-        "index.html",
-        {
+        "group.html", {
             "page": page,
-            "post_list": post_list,
-            "paginator": paginator
+            "group": group,
+            "posts": posts,
+            "paginator": paginator,
+            "feed_cache": caching.FeedFragment(
+                request, counters.group_scope(group.pk)
+            ),
         }
     )
 
 
-def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    paginator = Paginator(posts, 12)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
+def search_posts(request):
+    query = request.GET.get("q", "").strip()
+    posts = search.rank_posts(Post.objects.feed(), query)
+    paginator = Paginator(posts, 10)
+    page = paginator.get_page(request.GET.get("page"))
     return render(
         request,
-        "group.html", {
+        "posts/search.html",
+        {
             "page": page,
-            "group": group,
-            "posts": posts,
             "paginator": paginator,
+            "query": query,
         }
     )
 
 
+def _with_counters(groups):
+    """
+    Пары (группа, счётчик) страницы каталога.
+
+    Генератор: строки читаются при отрисовке, а не при попадании
+    во фрагмент кэша.
+    """
+    groups = list(groups)
+    rows = counters.get_counters(
+        *(counters.group_scope(group.pk) for group in groups)
+    )
+    for group in groups:
+        yield group, rows[counters.group_scope(group.pk)]
+
+
 def group_list(request):
-    groups = Group.objects.all()
-    return render(request, "posts/group_list.html", {"groups": groups})
+    groups = Group.objects.only("title", "slug", "description").order_by(
+        "title", "pk"
+    )
+    paginator = Paginator(groups, 20)
+    page = paginator.get_page(request.GET.get("page"))
+    return render(
+        request,
+        "posts/group_list.html",
+        {
+            "page": page,
+            "paginator": paginator,
+            "groups": _with_counters(page),
+            "directory_cache": caching.FeedFragment(
+                request, caching.GROUP_DIRECTORY,
+                timeout=settings.POSTS_GROUP_DIRECTORY_TIMEOUT,
+            ),
+        }
+    )
 
 
 @login_required
 def new_post(request):
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     if request.method == 'GET' or not form.is_valid():
         return render(request, "posts/new.html", {"form": form})
 
@@ -56,37 +160,71 @@ def new_post(request):
     return redirect("index")
 
 
+def _author_card(request, author):
+    """Контекст posts_author.html: счётчики и состояние подписки."""
+    counts = counters.get_counts(
+        counters.author_scope(author.pk),
+        counters.followers_scope(author.pk),
+        counters.follows_scope(author.pk),
+    )
+    following = (
+        request.user.is_authenticated and request.user != author
+        and Follow.objects.filter(user=request.user, author=author).exists()
+    )
+    return {
+        "post_count": counts[counters.author_scope(author.pk)],
+        "followers_count": counts[counters.followers_scope(author.pk)],
+        "follows_count": counts[counters.follows_scope(author.pk)],
+        "following": following,
+    }
+
+
+@conditional_page(_profile_state)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-    post_count = post_list.count()
-    paginator = Paginator(post_list, 5)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
+    author = get_object_or_404(User, pk=_author_id_or_404(username))
+    post_list = author.posts.feed().count_from(
+        counters.author_scope(author.pk)
+    )
+    page_size = streaming.per_page(request, 5)
+    paginator, page = paginate(request, post_list, page_size)
     context = {"page": page,
                "author": author,
-               "post_count": post_count,
-               "paginator": paginator}
+               "paginator": paginator,
+               "feed_cache": caching.FeedFragment(
+                   request,
+                   counters.author_scope(author.pk),
+                   request.user == author,
+               ),
+               **_author_card(request, author)}
+    if streaming.is_streamed(page_size):
+        return streaming.stream_page(request, "posts/profile.html", context,
+                                     "posts_view.html")
     return render(request, "posts/profile.html", context)
 
 
+@conditional_page(_post_state)
 def post_view(request, username, post_id):
-    post = get_object_or_404(Post, id=post_id, author__username=username)
-    count = Post.objects.filter(author=post.author).count()
+    post = get_object_or_404(
+        Post.objects.feed(), id=post_id, author_id=_author_id_or_404(username)
+    )
+    card = _author_card(request, post.author)
     context = {
         "post": post,
         "author": post.author,
-        "count": count,
+        "count": card["post_count"],
+        **card,
     }
     return render(request, "posts/post.html", context)
 
 
 def post_edit(request, username, post_id):
-    post = get_object_or_404(Post, id=post_id, author__username=username)
+    post = get_object_or_404(Post, id=post_id,
+                             author_id=_author_id_or_404(username))
     if request.user != post.author:
         return redirect("post", username=username, post_id=post_id)
 
-    form = PostForm(request.POST or None, instance=post)
+    form = PostForm(request.POST or None, files=request.FILES or None,
+                    instance=post)
     if request.method == 'POST' and form.is_valid():
         post = form.save()
         return redirect("post", username=username,
@@ -95,3 +233,33 @@ def post_edit(request, username, post_id):
     return render(request, "posts/new.html", {"form": form,
                                               "post": post,
                                               "is_edit": True})
+
+
+@login_required
+def follow_index(request):
+    post_list = timeline.feed(request.user)
+    paginator = Paginator(post_list, 10)
+    page = paginator.get_page(request.GET.get("page"))
+    return render(
+        request,
+        "posts/follow.html",
+        {"page": page, "paginator": paginator}
+    )
+
+
+@login_required
+@require_POST
+def profile_follow(request, username):
+    author_id = _author_id_or_404(username)
+    if author_id != request.user.pk:
+        Follow.objects.get_or_create(user=request.user, author_id=author_id)
+    return redirect("profile", username=username)
+
+
+@login_required
+@require_POST
+def profile_unfollow(request, username):
+    Follow.objects.filter(
+        user=request.user, author_id=resolvers.user_id(username)
+    ).delete()
+    return redirect("profile", username=username)
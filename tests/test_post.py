@@ -69,8 +69,8 @@ class TestPostEditView:
 
         assert 'form' in response.context, \
             'Проверьте, что передали форму `form` в контекст страницы `/<username>/<post_id>/edit/`'
-        assert len(response.context['form'].fields) == 2, \
-            'Проверьте, что в форме `form` на страницу `/<username>/<post_id>/edit/` 2 поля'
+        assert len(response.context['form'].fields) == 3, \
+            'Проверьте, что в форме `form` на страницу `/<username>/<post_id>/edit/` 3 поля'
         assert 'group' in response.context['form'].fields, \
             'Проверьте, что в форме `form` на странице `/new/` есть поле `group`'
         assert type(response.context['form'].fields['group']) == forms.models.ModelChoiceField, \
@@ -85,6 +85,11 @@ class TestPostEditView:
         assert response.context['form'].fields['text'].required, \
             'Проверьте, что в форме `form` на странице `/new/` поле `group` обязательно'
 
+        assert 'image' in response.context['form'].fields, \
+            'Проверьте, что в форме `form` на странице `/<username>/<post_id>/edit/` есть поле `image`'
+        assert type(response.context['form'].fields['image']) == forms.fields.ImageField, \
+            'Проверьте, что в форме `form` на странице `/<username>/<post_id>/edit/` поле `image` типа `ImageField`'
+
     @pytest.mark.django_db(transaction=True)
     def test_post_edit_view_author_post(self, user_client, post_with_group):
         text = 'Проверка изменения поста!'
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+
+def get_cache():
+    return caches[settings.USERS_CACHE_ALIAS]
+
+
+def user_key(user_id):
+    return f"users:user:{user_id}"
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend, который берёт пользователя сессии из кэша.
+
+    AuthenticationMiddleware и так разрешает request.user лениво, при
+    первом обращении; здесь убирается и запрос к auth_user на каждый
+    запрос авторизованного пользователя. Запись сбрасывается сигналами
+    users.signals при сохранении и удалении пользователя и ещё раз после
+    фиксации транзакции.
+    """
+
+    def get_user(self, user_id):
+        cache = get_cache()
+        key = user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.USERS_CACHE_TIMEOUT)
+        return user
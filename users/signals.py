@@ -0,0 +1,16 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .backends import get_cache, user_key
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def user_changed(sender, instance, **kwargs):
+    key = user_key(instance.pk)
+    get_cache().delete(key)
+    # Параллельный запрос до фиксации транзакции может снова положить
+    # в кэш старую строку — со старым хешем пароля и is_active.
+    transaction.on_commit(lambda: get_cache().delete(key))
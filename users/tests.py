@@ -1,3 +1,71 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from users.backends import CachedModelBackend, get_cache, user_key
+
+USER_LOOKUP = 'FROM "auth_user" WHERE "auth_user"."id" ='
+SESSION_LOOKUP = 'FROM "django_session"'
+
+
+class SessionQueriesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create(username='testuser')
+
+    def setUp(self):
+        cache.clear()
+
+    def lookups(self, client):
+        with CaptureQueriesContext(connection) as queries:
+            client.get(reverse('index'))
+        sql = [query['sql'] for query in queries]
+        return (sum(USER_LOOKUP in query for query in sql),
+                sum(SESSION_LOOKUP in query for query in sql))
+
+    def test_anonymous_feed_skips_session_and_user(self):
+        """Гость в ленте не читает ни сессию, ни пользователя."""
+        self.assertEqual(self.lookups(Client()), (0, 0))
+
+    @override_settings(
+        SESSION_ENGINE='django.contrib.sessions.backends.cached_db'
+    )
+    def test_authorized_user_and_session_come_from_cache(self):
+        """Пользователь и сессия берутся из кэша со второго запроса."""
+        client = Client()
+        client.force_login(self.user)
+        client.get(reverse('index'))
+        self.assertEqual(self.lookups(client), (0, 0))
+
+    def test_user_change_drops_cached_user(self):
+        """Изменение пользователя сразу видно в следующем запросе."""
+        client = Client()
+        client.force_login(self.user)
+        client.get(reverse('index'))
+        self.user.first_name = 'Лев'
+        self.user.save()
+        response = client.get(reverse('index'))
+        self.assertEqual(response.context['user'].first_name, 'Лев')
+
+
+class CachedUserInvalidationTest(TransactionTestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.user = get_user_model().objects.create(username='testuser')
+
+    def test_user_recached_during_transaction_is_dropped_on_commit(self):
+        """Строка, закэшированная до фиксации, сбрасывается после неё."""
+        with transaction.atomic():
+            self.user.is_active = False
+            self.user.save()
+            # Так старую строку положил бы параллельный запрос.
+            stale = get_user_model().objects.get(pk=self.user.pk)
+            stale.is_active = True
+            get_cache().set(user_key(self.user.pk), stale)
+        self.assertIsNone(get_cache().get(user_key(self.user.pk)))
+        self.assertIsNone(CachedModelBackend().get_user(self.user.pk))
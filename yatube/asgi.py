@@ -0,0 +1,162 @@
+"""
+ASGI config for yatube project.
+
+Django 2.2 has no native ASGI handler, so ``application`` adapts the WSGI
+application instead. The request body is received and the response is sent
+on the event loop, while Django itself runs in a bounded thread pool of
+``settings.ASGI_THREADS`` workers. A slow client therefore occupies a cheap
+coroutine rather than a worker thread for the whole response. Bodies larger
+than ``settings.FILE_UPLOAD_MAX_MEMORY_SIZE`` are spooled to a temporary
+file, so uploads are not held in memory.
+
+Serve it with any ASGI server, for example::
+
+    uvicorn yatube.asgi:application
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+django_application = get_wsgi_application()
+
+
+class WsgiToAsgi:
+    def __init__(self, wsgi_application, max_workers):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='django'
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise ValueError(f"Unsupported ASGI scope type {scope['type']}")
+
+        body = await self.read_body(receive)
+        try:
+            await self.respond(scope, body, send)
+        finally:
+            body.close()
+
+    async def respond(self, scope, body, send):
+        loop = asyncio.get_running_loop()
+        status, headers, chunks = await loop.run_in_executor(
+            self.executor, self.run_application, scope, body
+        )
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': headers,
+        })
+        try:
+            while True:
+                # Каждый кусок потокового ответа готовится в пуле, а
+                # отправляется медленному клиенту уже из цикла событий.
+                chunk = await loop.run_in_executor(
+                    self.executor, next, chunks, None
+                )
+                if chunk is None:
+                    break
+                if chunk:
+                    await send({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': True,
+                    })
+        finally:
+            await loop.run_in_executor(self.executor, self.close, chunks)
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @staticmethod
+    async def read_body(receive):
+        body = tempfile.SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+        )
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                break
+            body.write(message.get('body', b''))
+            if not message.get('more_body', False):
+                break
+        body.seek(0)
+        return body
+
+    def run_application(self, scope, body):
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [
+                (name.lower().encode('latin1'), value.encode('latin1'))
+                for name, value in headers
+            ]
+
+        iterable = self.wsgi_application(
+            self.environ(scope, body), start_response
+        )
+        return response['status'], response['headers'], iter(iterable)
+
+    @staticmethod
+    def close(chunks):
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+    @staticmethod
+    def environ(scope, body):
+        server_name, server_port = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', ''),
+            'PATH_INFO': scope['path'].encode('utf8').decode('latin1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin1'),
+            'SERVER_NAME': server_name,
+            'SERVER_PORT': str(server_port),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'REMOTE_ADDR': client[0],
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': body,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        for name, value in scope.get('headers', []):
+            name = name.decode('latin1').upper().replace('-', '_')
+            value = value.decode('latin1')
+            if name == 'CONTENT_TYPE':
+                environ['CONTENT_TYPE'] = value
+            elif name == 'CONTENT_LENGTH':
+                environ['CONTENT_LENGTH'] = value
+            else:
+                key = f'HTTP_{name}'
+                if key in environ:
+                    value = f'{environ[key]},{value}'
+                environ[key] = value
+        return environ
+
+
+application = WsgiToAsgi(django_application, settings.ASGI_THREADS)
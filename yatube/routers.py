@@ -0,0 +1,64 @@
+"""
+Чтение с реплик, запись в основную базу.
+
+Реплики перечисляются в settings.DATABASE_REPLICAS; пока список пуст, всё
+идёт в default. С реплик читают только запросы, прошедшие через
+ReplicaStickinessMiddleware: management-команды, shell и миграции
+работают с основной базой. После запроса с небезопасным методом
+(публикация, правка, вход, регистрация, админка) клиент получает cookie,
+и следующие REPLICA_STICKY_SECONDS секунд его чтения тоже идут в основную
+базу — например, лента после redirect("index") уже показывает новую
+запись.
+"""
+import random
+import threading
+
+from django.conf import settings
+
+STICKY_COOKIE = "use_primary"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS", "TRACE")
+
+_local = threading.local()
+
+
+def reads_from_primary():
+    return (not settings.DATABASE_REPLICAS
+            or getattr(_local, "use_primary", True))
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if reads_from_primary():
+            return "default"
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии основной базы, связи между ними допустимы.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема приходит на реплики вместе с данными.
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaStickinessMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        unsafe = request.method not in SAFE_METHODS
+        _local.use_primary = unsafe or STICKY_COOKIE in request.COOKIES
+        try:
+            response = self.get_response(request)
+        finally:
+            del _local.use_primary
+        if unsafe and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                STICKY_COOKIE, "1",
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True, samesite="Lax",
+            )
+        return response
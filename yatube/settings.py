@@ -24,9 +24,12 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
+    'posts.metrics.MetricsMiddleware',
+    'yatube.routers.ReplicaStickinessMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -39,9 +42,12 @@ MIDDLEWARE = [
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
+# Сюда manage.py flatten_templates складывает шаблоны со встроенными include.
+TEMPLATES_BUILD_DIR = os.path.join(BASE_DIR, "build", "templates")
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates, замеряющий время рендеринга для /metrics.
+        'BACKEND': 'posts.metrics.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -58,6 +64,13 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+# Сколько последних запросов на каждое имя URL учитывается в перцентилях
+# /metrics.
+METRICS_WINDOW = 1024
+
+# Размер пула потоков, в котором yatube.asgi выполняет Django.
+ASGI_THREADS = 8
+
 
 DATABASES = {
     'default': {
@@ -66,6 +79,71 @@ DATABASES = {
     }
 }
 
+DATABASE_ROUTERS = ['yatube.routers.PrimaryReplicaRouter']
+# Псевдонимы баз-реплик для чтения; пусто — всё читается из default.
+DATABASE_REPLICAS = []
+# Сколько секунд после записи клиент читает из основной базы.
+REPLICA_STICKY_SECONDS = 10
+
+# PRAGMA, выполняемые на каждом новом соединении с SQLite
+# (posts.signals.tune_sqlite).
+SQLITE_PRAGMAS = {}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Кэш отрисованных фрагментов лент и версий их областей.
+POSTS_CACHE_ALIAS = 'default'
+POSTS_FRAGMENT_CACHE_TIMEOUT = 60 * 10
+# Каталог групп сбрасывается правкой группы, а число записей и дата
+# последней в нём устаревают не больше чем на столько секунд.
+POSTS_GROUP_DIRECTORY_TIMEOUT = 60
+
+# Размеры страниц лент, которые можно выбрать параметром ?per_page=.
+# Страницы от POSTS_STREAM_PER_PAGE записей отдаются потоком
+# (posts.streaming), записи читаются из базы пачками по CHUNK_SIZE.
+POSTS_PER_PAGE_CHOICES = (5, 10, 20, 50, 100)
+POSTS_STREAM_PER_PAGE = 50
+POSTS_STREAM_CHUNK_SIZE = 25
+
+# Разрешение username и slug из URL (posts.resolvers): до SIZE значений
+# в памяти процесса на TTL секунд, в общем кэше — на CACHE_TIMEOUT.
+POSTS_RESOLVER_SIZE = 10000
+POSTS_RESOLVER_TTL = 30
+POSTS_RESOLVER_CACHE_TIMEOUT = 3600
+
+# Начиная с этого размера ленты паджинатор берёт число записей из
+# счётчика вместо COUNT(*).
+POSTS_ESTIMATED_COUNT_THRESHOLD = 10000
+
+# Записи авторов, у которых подписчиков больше этого числа, не
+# раскладываются по лентам подписок при публикации, а подмешиваются при
+# чтении. Новый подписчик получает в ленту столько последних записей автора.
+FOLLOW_FANOUT_LIMIT = 10000
+FOLLOW_BACKFILL = 200
+
+# Фоновые задачи posts.jobs: "eager" — сразу в запросе (разработка и
+# тесты), "thread" — поток в процессе после коммита, "worker" — только
+# manage.py run_jobs. Упавшая задача повторяется через RETRY_DELAY секунд
+# с удвоением паузы, исполнитель держит задачу не дольше LEASE секунд.
+POSTS_JOBS_MODE = 'eager'
+POSTS_JOBS_BATCH_SIZE = 100
+POSTS_JOBS_MAX_ATTEMPTS = 5
+POSTS_JOBS_RETRY_DELAY = 10
+POSTS_JOBS_LEASE = 60 * 5
+POSTS_JOBS_POLL_INTERVAL = 5
+
+# Адрес сайта для ссылок в письмах подписчикам.
+POSTS_SITE_URL = 'http://127.0.0.1:8000'
+
+# Пользователь сессии кэшируется users.backends.CachedModelBackend.
+AUTHENTICATION_BACKENDS = ['users.backends.CachedModelBackend']
+USERS_CACHE_ALIAS = 'default'
+USERS_CACHE_TIMEOUT = 60 * 5
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -100,7 +178,39 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, "static"),
 ]
 
-# STATIC_ROOT = os.path.join(BASE_DIR, "static")
+# Сюда collectstatic собирает статику для production.
+STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+
+# Загрузки пишутся во временный файл по частям, а не собираются в памяти;
+# ImageField проверяет изображение прямо по пути к этому файлу.
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+# Миниатюры изображений записей: {размер: (геометрия, параметры sorl)}.
+# Их строят задачи posts.jobs, а ищет тег {% post_thumbnail %}.
+POSTS_THUMBNAILS = {
+    'feed': ('960x339', {'crop': 'center', 'upscale': True}),
+}
+THUMBNAIL_BACKEND = 'posts.thumbnails.ThumbnailBackend'
+# KV-хранилище sorl запоминает в кэше и отсутствие миниатюры; при
+# локальном кэше процесса такая запись не должна жить долго.
+THUMBNAIL_CACHE_TIMEOUT = 60 * 10
+
+# Связки статики: {% static_bundle %} подключает их одним файлом, если
+# collectstatic их склеил (yatube.staticfiles), и по частям — если нет.
+STATIC_BUNDLES = {
+    "bundles/site.css": [
+        "bootstrap/dist/css/bootstrap.min.css",
+    ],
+    "bundles/site.js": [
+        "jquery/dist/jquery.min.js",
+        "bootstrap/dist/js/bootstrap.min.js",
+    ],
+}
 
 LOGIN_URL = "/auth/login/"
 LOGIN_REDIRECT_URL = "index"
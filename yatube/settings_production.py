@@ -0,0 +1,71 @@
+"""
+Production settings for yatube project.
+
+Use with ``DJANGO_SETTINGS_MODULE=yatube.settings_production`` after running
+``manage.py flatten_templates`` and ``manage.py collectstatic``.
+"""
+
+from .settings import *  # noqa: F401,F403
+from .settings import (DATABASES, MIDDLEWARE, TEMPLATES,
+                       TEMPLATES_BUILD_DIR, TEMPLATES_DIR)
+
+DEBUG = False
+
+# Соединение живёт между запросами, поэтому PRAGMA ниже выполняются
+# один раз на поток, а не на каждый запрос.
+DATABASES = {
+    'default': dict(
+        DATABASES['default'],
+        CONN_MAX_AGE=600,
+        OPTIONS={'timeout': 20},
+    ),
+}
+
+# Сессия читается из кэша и только при промахе из базы; запись идёт
+# в обе стороны, поэтому выход и смена пароля не теряются.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# Побочные эффекты публикации выполняет поток в процессе, а не запрос
+# автора; для отдельного исполнителя — POSTS_JOBS_MODE = 'worker' и
+# manage.py run_jobs.
+POSTS_JOBS_MODE = 'thread'
+
+# WAL: читатели не ждут пишущего, а он — их. synchronous=NORMAL в режиме
+# WAL безопасен для целостности базы и не делает fsync на каждый коммит.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+# Шаблоны читаются и компилируются один раз на процесс; собранные
+# flatten_templates версии без include имеют приоритет над исходными.
+TEMPLATES = [
+    {
+        'BACKEND': TEMPLATES[0]['BACKEND'],
+        'DIRS': [TEMPLATES_BUILD_DIR, TEMPLATES_DIR],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            'context_processors': (
+                TEMPLATES[0]['OPTIONS']['context_processors']
+            ),
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
+        },
+    },
+]
+
+# collectstatic склеивает связки, хеширует имена и сжимает файлы; их
+# отдаёт StaticFilesMiddleware раньше остальных middleware.
+STATICFILES_STORAGE = 'yatube.staticfiles.BundledManifestStorage'
+MIDDLEWARE = [
+    'yatube.staticfiles.StaticFilesMiddleware',
+    'yatube.staticfiles.MediaFilesMiddleware',
+    *MIDDLEWARE,
+]
@@ -0,0 +1,23 @@
+"""
+Production settings with a read replica.
+
+Reads go to the ``replica`` alias, writes to ``default``. With SQLite the
+replica is a copy of the primary file refreshed by ``manage.py
+sync_replicas``; with a real replicated database point ``replica`` at it.
+"""
+
+import os
+
+from .settings_production import *  # noqa: F401,F403
+from .settings_production import BASE_DIR, DATABASES
+
+DATABASES = dict(
+    DATABASES,
+    replica=dict(
+        DATABASES['default'],
+        NAME=os.path.join(BASE_DIR, 'db.replica.sqlite3'),
+        TEST={'MIRROR': 'default'},
+    ),
+)
+
+DATABASE_REPLICAS = ['replica']
@@ -0,0 +1,166 @@
+"""
+Статика в production: связки, хеши в именах, сжатые копии и раздача.
+
+collectstatic с BundledManifestStorage склеивает файлы каждой связки из
+STATIC_BUNDLES в один, дописывает к именам хеш содержимого (manifest) и
+кладёт рядом с каждым хешированным текстовым файлом копии .gz и .br.
+StaticFilesMiddleware отдаёт STATIC_ROOT: сжатую копию по
+Accept-Encoding и годовой Cache-Control для имён с хешем — при смене
+содержимого меняется и имя, так что кэш браузера не устаревает.
+MediaFilesMiddleware так же отдаёт MEDIA_ROOT.
+"""
+import gzip
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import (ManifestStaticFilesStorage,
+                                                staticfiles_storage)
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+from sorl.thumbnail.conf import settings as thumbnail_settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Файлы без хеша (их имена не меняются) браузер перепроверяет чаще.
+MUTABLE = "public, max-age=3600"
+
+
+def _compressors():
+    """(суффикс, Content-Encoding, функция) в порядке предпочтения."""
+    if brotli is not None:
+        yield ".br", "br", brotli.compress
+    yield ".gz", "gzip", lambda content: gzip.compress(content, 9, mtime=0)
+
+
+class BundledManifestStorage(ManifestStaticFilesStorage):
+    bundles = True
+    compressible_types = (".css", ".js", ".svg", ".map", ".json", ".txt")
+    # Меньшие файлы почти не сжимаются, а заголовки стоят дороже.
+    min_compress_size = 512
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            paths = dict(paths)
+            for name in settings.STATIC_BUNDLES:
+                paths[name] = (self, self.write_bundle(name, paths))
+        yield from super().post_process(paths, dry_run, **options)
+        if not dry_run:
+            for name in self.hashed_files.values():
+                if name.endswith(self.compressible_types):
+                    self.compress(name)
+
+    def stored_name(self, name):
+        # До первого collectstatic манифеста нет: имена без хеша, как при
+        # DEBUG, вместо ошибки 500 на каждой странице.
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def write_bundle(self, name, paths):
+        # Ссылки url() в склеенных CSS считаются от пути связки, поэтому
+        # в связку попадают только файлы без относительных ссылок.
+        separator = b"\n" if name.endswith(".css") else b"\n;\n"
+        parts = []
+        for source in settings.STATIC_BUNDLES[name]:
+            if source not in paths:
+                raise ValueError(f"{name}: нет файла {source} в статике.")
+            storage, path = paths[source]
+            with storage.open(path) as file:
+                parts.append(file.read())
+        if self.exists(name):
+            self.delete(name)
+        return self._save(name, ContentFile(separator.join(parts)))
+
+    def compress(self, name):
+        with self.open(name) as file:
+            content = file.read()
+        if len(content) < self.min_compress_size:
+            return
+        for suffix, _, compress in _compressors():
+            compressed = compress(content)
+            if len(compressed) >= len(content):
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
+
+
+class StaticFilesMiddleware:
+    """Раздаёт STATIC_ROOT в production, где runserver статику не отдаёт."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        self.root = settings.STATIC_ROOT
+        self.immutable = set(
+            getattr(staticfiles_storage, "hashed_files", {}).values()
+        )
+
+    def __call__(self, request):
+        path = request.path_info
+        if path.startswith(self.prefix):
+            response = self.serve(request, path[len(self.prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def serve(self, request, name):
+        try:
+            path = safe_join(self.root, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+
+        header = request.META.get("HTTP_ACCEPT_ENCODING", "")
+        accepted = {part.split(";")[0].strip() for part in header.split(",")}
+        served, encoding = path, None
+        for suffix, coding, _ in _compressors():
+            if coding in accepted and os.path.isfile(path + suffix):
+                served, encoding = path + suffix, coding
+                break
+
+        stat = os.stat(served)
+        if not was_modified_since(request.META.get("HTTP_IF_MODIFIED_SINCE"),
+                                  stat.st_mtime, stat.st_size):
+            response = HttpResponseNotModified()
+        else:
+            content_type, _ = mimetypes.guess_type(path)
+            response = FileResponse(
+                open(served, "rb"),
+                content_type=content_type or "application/octet-stream",
+            )
+            response["Last-Modified"] = http_date(stat.st_mtime)
+            if encoding:
+                response["Content-Encoding"] = encoding
+        response["Vary"] = "Accept-Encoding"
+        response["Cache-Control"] = self.cache_control(name)
+        return response
+
+    def cache_control(self, name):
+        return IMMUTABLE if name in self.immutable else MUTABLE
+
+
+class MediaFilesMiddleware(StaticFilesMiddleware):
+    """Раздаёт MEDIA_ROOT: загруженные изображения и миниатюры sorl."""
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.prefix = settings.MEDIA_URL
+        self.root = settings.MEDIA_ROOT
+
+    def cache_control(self, name):
+        # Имя миниатюры — хеш источника и параметров, файл по такому
+        # имени не меняется.
+        if name.startswith(thumbnail_settings.THUMBNAIL_PREFIX):
+            return IMMUTABLE
+        return MUTABLE
@@ -13,13 +13,22 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from posts.metrics import metrics_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("auth/", include("users.urls")),
     path("auth/", include("django.contrib.auth.urls")),
+    path("metrics", metrics_view, name="metrics"),
     path("", include("posts.urls")),
     path("about/", include("about.urls", namespace="about")),
 ]
+
+# Загруженные файлы при DEBUG; в production их отдаёт
+# yatube.staticfiles.MediaFilesMiddleware.
+urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)